@@ -12,7 +12,16 @@ $backupFileName = "prompts_$dateTimeString.py"
 Copy-Item -Path "e:\prompts.py" -Destination "e:\$backupFileName" -Force -Verbose
 
 # copy Source to Target
-copy -Force -Verbose -Path .\src\* -Destination e:\
+# the layout_*.py tables are frozen into the firmware (firmware/RPI_PICO/manifest.py):
+# copies on the filesystem come first on sys.path and would load them into RAM
+Remove-Item -Force -Verbose -Path e:\layout_*.py -ErrorAction SilentlyContinue
+copy -Force -Verbose -Path .\src\* -Exclude layout_*.py -Destination e:\
+# firmware built without the frozen layouts: the board needs the copies
+mpremote exec "import layout_us"
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "Layouts are not frozen into the firmware, copying them"
+    copy -Force -Verbose -Path .\src\layout_*.py -Destination e:\
+}
 
 # final resets
 mpremote reset 
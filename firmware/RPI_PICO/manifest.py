@@ -1,3 +1,9 @@
 include("$(PORT_DIR)/boards/manifest.py")
 freeze("./typing_modules", opt=3)
+# keyboard layout tables, frozen to keep them in flash
+freeze(
+    "$(BOARD_DIR)/../../src",
+    ("layout_us.py", "layout_uk.py", "layout_nl.py", "layout_de.py", "layout_fr.py"),
+    opt=3,
+)
 
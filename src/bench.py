@@ -0,0 +1,152 @@
+# Micro-benchmarks for the typing pipeline
+#
+# Run on the board with `mpremote run src/bench.py`, or on the host with the
+# MicroPython unix port: `MICROPYPATH=src:typings micropython src/bench.py`
+
+import time
+
+import macro_kc
+from macro_kc import DEAD, HOLD, PAUSE, compile_keychords, iter_keychords, set_typematic
+from prompts import prompts
+from usb.device.keyboard import KeyCode as KC
+
+# the character map before the layout tables, for comparison
+a_to_z = range(ord("a"), ord("z") + 1)
+one_to_nine = range(ord("1"), ord("9") + 1)
+
+charmap = {
+    # additional Common Keys
+    9: KC.TAB,  # \t
+    # 10: KC.ENTER
+    10: (
+        KC.LEFT_SHIFT,
+        KC.ENTER,
+    ),  # Shift-Enter gives LF without Sending(Enter) the prompt in Copilot
+    32: KC.SPACE,
+    33: (KC.LEFT_SHIFT, KC.N1),  # !
+    34: (KC.LEFT_SHIFT, KC.QUOTE),  # "
+    35: (KC.HASH),  # #
+    36: (KC.LEFT_SHIFT, KC.N4),  # $
+    37: (KC.LEFT_SHIFT, KC.N5),  # %
+    38: (KC.LEFT_SHIFT, KC.N7),  # &
+    39: (KC.QUOTE),  # '
+    40: (KC.LEFT_SHIFT, KC.N9),  # (
+    41: (KC.LEFT_SHIFT, KC.N0),  # )
+    42: (KC.LEFT_SHIFT, KC.N8),  # *
+    43: (KC.LEFT_SHIFT, KC.EQUAL),  # +
+    44: KC.COMMA,  # ,
+    45: KC.MINUS,  # -
+    46: KC.DOT,  # .
+    47: KC.SLASH,  # /
+    58: (KC.LEFT_SHIFT, KC.COLON),
+    59: KC.COLON,
+    60: (KC.LEFT_SHIFT, KC.COMMA),  # <
+    61: KC.EQUAL,
+    62: (KC.LEFT_SHIFT, KC.DOT),  # >
+    63: (KC.LEFT_SHIFT, KC.SLASH),  # ?
+    64: (KC.LEFT_SHIFT, KC.N2),  # @,
+    91: KC.OPEN_BRACKET,  # [
+    92: KC.BACKSLASH,  # \
+    93: KC.CLOSE_BRACKET,  # ]
+    94: (KC.LEFT_SHIFT, KC.N6),  # ^
+    95: (KC.LEFT_SHIFT, KC.MINUS),  # _
+    123: (KC.LEFT_SHIFT, KC.OPEN_BRACKET),  # {
+    124: (KC.LEFT_SHIFT, KC.BACKSLASH),  # |
+    125: (KC.LEFT_SHIFT, KC.CLOSE_BRACKET),  # }
+    126: (KC.LEFT_SHIFT, KC.TILDE),  # ` ~
+    163: (KC.LEFT_SHIFT, KC.N3),  # £
+}
+
+
+
+def scancode_branchy(char: str):
+    # the scancode() lookup before it was table driven, for comparison
+    upper = char.isupper()
+    char_ = ord(char.lower())
+    if char_ in a_to_z:
+        if upper:
+            return KC.LEFT_SHIFT, char_ - 97 + KC.A
+        else:
+            return char_ - 97 + KC.A
+    elif char_ in one_to_nine:
+        return char_ - 49 + KC.N1
+    elif char_ == 48:
+        return KC.N0
+    elif k := charmap.get(char_):
+        return k
+    else:
+        return 0
+
+
+def scancode(char: str):
+    # the table driven lookup of one character on the current layout
+    c = ord(char)
+    if c > 0xFF:
+        return 0
+    if mod := macro_kc.MODS[c] & ~DEAD:
+        return -mod, macro_kc.KEYS[c]
+    return macro_kc.KEYS[c]
+
+
+def sample_text() -> str:
+    texts = []
+    for binding in prompts.values():
+        texts.extend([binding] if isinstance(binding, str) else binding)
+    return "".join(texts)
+
+
+def chars_per_second(name: str, fn, text: str, rounds: int = 5):
+    t_start = time.ticks_us()
+    for _ in range(rounds):
+        fn(text)
+    us = max(1, time.ticks_diff(time.ticks_us(), t_start))
+    print(f"{name:<24} {rounds * len(text) * 1000000 // us:>8} chars/s")
+
+
+def count_reports(compiled: bytearray):
+    # reports sent for compiled reports without delay, and the number of pauses
+    pauses = reports = i = 0
+    while i < len(compiled):
+        if compiled[i + 1] == PAUSE:
+            pauses += 1
+        if compiled[i + 1] >= HOLD:
+            i += 2
+        else:
+            reports += 1
+            i += 8
+    return reports + 1, pauses
+
+
+def run():
+    text = sample_text()
+    print(f"{len(text)} chars of sample prompts")
+    chars_per_second("scancode (branchy)", lambda t: [scancode_branchy(c) for c in t], text)
+    chars_per_second("scancode (table)", lambda t: [scancode(c) for c in t], text)
+    chars_per_second("compile_keychords", compile_keychords, text)
+    shouting = "PLEASE SUMMARIZE THE FOLLOWING IN UPPER CASE: NASA, HTML, URL & API (V2)!\n" * 4
+    for sample, name in ((text, "sample prompts"), (shouting, "upper case")):
+        for burst in (False, True):
+            reports, pauses = count_reports(compile_keychords(sample, burst))
+            print(f"{name}, burst={burst}: {reports} reports, {reports + pauses} with a delay")
+    # the host polls once per bInterval, so the reports per char set the typing speed.
+    # Estimates from the report counts, one report per poll; NKRO types without burst,
+    # its bitmap loses the order of the keys in a report.
+    for mode, poll_ms, bursts in (("6KRO, 8 ms polling", 8, (False, True)), ("NKRO, 1 ms polling", 1, (False,))):
+        for burst in bursts:
+            reports, _ = count_reports(compile_keychords(text, burst))
+            print(f"{mode}, burst={burst}: about {len(text) * 1000 // (reports * poll_ms)} chars/s (estimate)")
+    code = "def f():\n" + " " * 40 + "return 1\n" + "#" * 60 + "\n"
+    for typematic in (None, (500, 30)):
+        set_typematic(typematic)
+        reports, pauses = count_reports(compile_keychords(code))
+        print(f"typematic={typematic}: {reports} reports, {pauses} pauses for a code block")
+    set_typematic()
+    for copies in (1, 10):
+        big = text * copies
+        for name, first in (("compile_keychords", compile_keychords), ("iter_keychords", lambda t: next(iter_keychords(t)))):
+            t_start = time.ticks_us()
+            first(big)
+            print(f"{len(big)} chars, {name}: first report after {time.ticks_diff(time.ticks_us(), t_start)} us")
+
+
+run()
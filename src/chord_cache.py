@@ -0,0 +1,60 @@
+# LRU cache of compiled prompts, bounded by a byte budget and the free heap
+
+import gc
+
+from macro_kc import compile_keychords, iter_keychords
+
+
+class ChordCache:
+    BYTES_PER_CHAR = 10  # rough size of a compiled character, to skip prompts that won't fit
+
+    def __init__(self, max_bytes: int = 24 * 1024, min_free: int = 32 * 1024):
+        self.max_bytes = max_bytes  # total size of the cached reports
+        self.min_free = min_free  # evict prompts to keep this much heap free
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._reports = {}
+        self._lru = []  # least recently used first
+
+    def __len__(self):
+        return len(self._reports)
+
+    def clear(self):
+        self._reports = {}
+        self._lru = []
+        self.size = 0
+
+    def chunks(self, prompt: str, burst: bool = False):
+        # The compiled reports to type prompt, see compile_keychords(): the cached
+        # reports, or chunks compiled on the fly if the prompt is too big for the cache
+        if (reports := self.get(prompt, burst)) is not None:
+            return (reports,)
+        return iter_keychords(prompt, burst)
+
+    def get(self, prompt: str, burst: bool = False):
+        # Return the compiled reports for prompt, compiling them on a miss.
+        # Returns None for prompts that are too big to cache.
+        if len(prompt) * self.BYTES_PER_CHAR > self.max_bytes:
+            return None
+        key = (prompt, True) if burst else prompt
+        reports = self._reports.get(key)
+        if reports is not None:
+            self.hits += 1
+            if self._lru[-1] != key:
+                self._lru.remove(key)
+                self._lru.append(key)
+            return reports
+        self.misses += 1
+        reports = compile_keychords(prompt, burst)
+        if len(reports) <= self.max_bytes:
+            self._make_room(len(reports))
+            self._reports[key] = reports
+            self._lru.append(key)
+            self.size += len(reports)
+        return reports
+
+    def _make_room(self, needed: int):
+        while self._lru and (self.size + needed > self.max_bytes or gc.mem_free() < self.min_free):
+            self.size -= len(self._reports.pop(self._lru.pop(0)))
+            gc.collect()
@@ -1,14 +1,23 @@
 # MicroPython USB macro Keypad
 
+import _thread
+import asyncio
 import logging
 import time
-from typing import Any,  List, NoReturn, Tuple
+from typing import Any,  List, NoReturn, Optional, Tuple
 
+import machine
 import usb.device
 from machine import Pin
-from read_config import update_prompts
-from macro_kc import as_keychords
-from usb.device.keyboard import KeyboardInterface,  LEDCode
+from read_config import ConfigFile, config_values
+from chord_cache import ChordCache
+from pacing import Pacer
+from report_pump import ReportPump
+from scan import Debouncer, GpioScanner, KeyEvents, MatrixScanner, gpio_number
+from nkro import NKRO_POLL_MS, NKRO_REPORT_DESC, NKRO_REPORT_LEN, nkro_report
+from macro_kc import set_layout, set_typematic, set_unicode
+from typist import Typist
+from usb.device.keyboard import KeyboardInterface, LEDCode
 
 logging.basicConfig(level=logging.DEBUG)
 log = logging.getLogger("kb")
@@ -16,8 +25,7 @@ log = logging.getLogger("kb")
 
 # Tuples mapping Pin inputs to the KeyCode each input generates
 #
-# (Big keyboards usually multiplex multiple keys per input with a scan matrix,
-# but this is a simple example.)
+# (Bigger boards multiplex the keys with a scan matrix, see MATRIX below.)
 KEYS: List[Tuple[Pin, str]] = [
     (Pin.cpu.GPIO28, "1"),
     (Pin.cpu.GPIO2, "2"),
@@ -31,6 +39,17 @@ KEYS: List[Tuple[Pin, str]] = [
     # ... add more pin to KeyCode mappings here if needed
 ]
 
+# Key matrix of boards with more keys than pins, such as hw_designs/4x4.
+# With a matrix the pins in KEYS are not used, only the key ids, in matrix order:
+# MATRIX = MatrixScanner(
+#     rows=(Pin.cpu.GPIO2, Pin.cpu.GPIO3, Pin.cpu.GPIO4, Pin.cpu.GPIO5),
+#     cols=(Pin.cpu.GPIO6, Pin.cpu.GPIO7, Pin.cpu.GPIO8, Pin.cpu.GPIO9),
+#     col2row=True,  # diode direction
+#     settle_us=5,  # time for a strobe line to settle before reading the sense lines
+# )
+# KEYS = [(None, id) for id in "abcdefghijklmnop"]
+MATRIX = None
+
 # Tuples mapping Pin outputs to the LEDCode that turns the output on
 LEDS = (
     (Pin.board.LED, LEDCode.CAPS_LOCK),
@@ -39,118 +58,527 @@ LEDS = (
 
 prompt_bindings = {}
 
+# Entry point: False for the run_keyboard() loop, True for the asyncio runtime
+USE_ASYNCIO = False
+# run_keyboard() types on the second core, scanning stays on the first
+DUAL_CORE = False
+# NKRO bitmap reports with a 1 ms polling interval, instead of 6-key reports every 8 ms.
+# Hosts that ask for the boot protocol get 6-key reports.
+NKRO = False
+
 
 def show_key_state(keys=KEYS):
     for pin, code in keys:
-        print(f"{pin} {pin.value()}")
+        if pin is not None:
+            print(f"{pin} {pin.value()}")
+
+
+def binding_texts(bindings: dict):
+    for binding in bindings.values():
+        if isinstance(binding, str):
+            yield binding
+        elif isinstance(binding, list):
+            yield from binding
+
+
+def step_prompt(step: str) -> str:
+    # the steps of a multi-step prompt are separated by a space
+    if not step.endswith(" ") or step.endswith("."):
+        step += " "
+    return step
+
+
+class Binding:
+    # The prompts of a key and their compiled reports, resolved once when the config is loaded.
+    # A multi-step binding types its steps on successive presses, then ".\n".
+    __slots__ = ("prompts", "reports", "step", "burst")
+
+    def __init__(self, binding, burst: bool):
+        if isinstance(binding, list):
+            self.prompts = tuple(step_prompt(step) for step in binding) + (".\n",)
+        else:
+            self.prompts = (binding,)
+        self.reports = (None,) * len(self.prompts)  # None for a prompt compiled when it is typed
+        self.step = 0
+        self.burst = burst
+
+    def next_step(self) -> int:
+        step = self.step
+        self.step = (step + 1) % len(self.prompts)
+        return step
 
 
 class PromptBoard(KeyboardInterface):
-    DEF_DELAY = -50
-    debounce_ms = 30
+    PRESS_TICKS = 2  # scan ticks (ms) a key must read pressed to register
+    RELEASE_TICKS = 5  # scan ticks (ms) a key must read released to register
+    CONFIG_PATH = "/prompts.py"  # prompts and options, reloaded when the file changes
+    RELOAD_MS = 1000  # how often to check the config file
+    QUEUE_LEN = 16  # key presses waiting for their prompt to be typed
+    PUMP_DEPTH = 8  # reports queued ahead for the interrupt endpoint, 0 to send each report directly
+    CACHE_BYTES = 24 * 1024  # budget for compiled prompts
+    CACHE_MIN_FREE = 32 * 1024  # evict compiled prompts to keep this much heap free
+    # Defaults for the options that can be set in the prompts file
+    OPTIONS = {
+        "burst": False,  # True or a list of key ids: type several keys per report
+        "delay": "auto",  # ms between keys, negative for a random delay, "auto" to adapt to the host
+        "layout": "us",  # keyboard layout of the host: "us", "uk", "nl" (US-International), "de", "fr"
+        "unicode": "ascii",  # non-ASCII input: "ascii" transliterates, "windows" or "linux" key sequences
+        "typematic": None,  # host auto-repeat (delay_ms, rate) to hold keys for long runs of a character
+        "preempt": "queue",  # a key pressed while typing: "queue" its prompt, or "cancel" the prompt and type it
+        "cancel_key": None,  # id of a key that cancels the prompt being typed
+        "echo": 0,  # reports between host round trips through the Scroll Lock LED, 0 for none
+    }
 
-    def __init__(self, keys: List[Tuple[Pin, Any]], leds):
-        global prompt_bindings
-        prompt_bindings = update_prompts(prompt_bindings, "/prompts.py")
+    def __init__(
+        self, keys: List[Tuple[Optional[Pin], Any]], leds, matrix: Optional[MatrixScanner] = None, nkro: bool = False
+    ):
+        self.config = ConfigFile(self.CONFIG_PATH)
+        self.options = self.OPTIONS
 
         super().__init__()
+        self.nkro = nkro
+        if nkro:
+            self.report_descriptor = NKRO_REPORT_DESC
+            # NKRO reports are filled from the 8-byte reports, the other one may still be in flight
+            self._nkro_reports = [bytearray(NKRO_REPORT_LEN), bytearray(NKRO_REPORT_LEN)]
+        self.cache = ChordCache(self.CACHE_BYTES, self.CACHE_MIN_FREE)
+        self.pacer = Pacer()
+        report_len = NKRO_REPORT_LEN if nkro else 8
+        self.pump = ReportPump(self, self.PUMP_DEPTH, report_len) if self.PUMP_DEPTH else None
+        self.led_mask = 0  # host keyboard LEDs, from the last SET_REPORT
+        self.waited_us = 0  # awaited for the interrupt endpoint before the next report
+        self.typist = Typist(self)
+        # asyncio runtime, set by run()
+        self._edge_flag = None  # a key changed
+        self._start_flag = None  # a prompt was started
+        self._led_flag = None  # the host LEDs changed
+        # dual core mode, set by start_core1()
+        self._commands = None  # ("start", prompt, burst, reports) or ("cancel",) for the typing core
+        self._lock = None
+        self._busy = False  # core 1 took a command and is not done with it, set under _lock
+        self._raw_report = None  # the last report sent as is, kept alive until the next one
+        self.keys = keys
+        self.bindings = []  # Binding of each key, None for keys without a prompt
+        self.compile_prompts()
+        self.apply_config(self.config.read())
         # Initialise all the pins as active-high inputs with pulldown resistors
-        self.key_state = {}  # used to record the state of multi-step prompts
+        self._edge = False  # a key changed since the last scan
+        self._edge_us = 0  # time of the first edge since the keys were last settled
+        if matrix:
+            assert matrix.n == len(keys), "KEYS needs an id for every matrix position"
+            self.scanner = matrix
+        else:
+            self.scanner = GpioScanner([gpio_number(pin) for pin, _ in keys])
+        self._scan_held = self.scanner.SCAN_WHILE_HELD
+        self.debouncer = Debouncer(len(keys), self.PRESS_TICKS, self.RELEASE_TICKS)
+        self.events = KeyEvents(self.QUEUE_LEN)  # keys pressed while typing, or together with another key
+        self._scan_ms = time.ticks_ms()
 
         for pin, id in keys:
-            pin.init(Pin.IN, Pin.PULL_DOWN)
+            if not matrix:
+                pin.init(Pin.IN, Pin.PULL_DOWN)
+        # the key pins, or the sense lines of the matrix, wake the scan
+        for pin in matrix.senses if matrix else (pin for pin, _ in keys):
+            pin.irq(self.on_edge, Pin.IRQ_RISING | Pin.IRQ_FALLING, hard=True)
             log.debug(f"Init pin {pin}")
-            self.key_state[id] = 0
 
         # Initialise all the LEDs as active-high outputs
+        self.leds = leds
         for pin, _ in leds:
             pin.init(Pin.OUT, value=0)
 
+    def desc_cfg(self, desc, itf_num, ep_num, strs):
+        if not self.nkro:
+            return super().desc_cfg(desc, itf_num, ep_num, strs)
+        # Boot interface subclass, so the host can switch to the boot protocol
+        desc.interface(itf_num, 1, 0x03, 0x01, 0x01, len(strs) if self.interface_str else 0)
+        if self.interface_str:
+            strs.append(self.interface_str)
+        self.get_hid_descriptor(desc)
+        self._int_ep = ep_num | 0x80
+        desc.endpoint(self._int_ep, "interrupt", NKRO_REPORT_LEN, NKRO_POLL_MS)
+        self.idle_rate = 0
+        self.protocol = 1  # report protocol, until SET_PROTOCOL asks for the boot protocol
+
+    def on_open(self):
+        super().on_open()
+        if self.pump is not None:
+            self.pump.kick()  # the release of a prompt ended by a bus reset
+
+    def on_reset(self):
+        # The host reset the bus, or the board was unplugged: the core cancelled the
+        # transfer in flight without calling back. The pump starts over and the prompt
+        # ends, the rest would be typed into whatever has the focus after the host
+        # enumerates the board again.
+        super().on_reset()
+        if self.pump is not None:
+            self.pump.reset()
+        self.cancel_prompt()
+
     def on_led_update(self, led_mask):
-        print(hex(led_mask))
-        for pin, code in LEDS:
+        self.led_mask = led_mask
+        if self._led_flag:
+            self._led_flag.set()
+        else:
+            self.show_leds()
+
+    def show_leds(self):
+        print(hex(self.led_mask))
+        for pin, code in self.leds:
             # Set the pin high if 'code' bit is set in led_mask
-            pin(code & led_mask)
+            pin(code & self.led_mask)
 
-    def is_pressed(self, pin: Pin) -> bool:
-        # basic debouncing
-        if not pin.value():
-            return False
-        # wait for debounce
-        time.sleep_ms(self.debounce_ms)
-        # check if still high
-        return pin.value() == 1
-
-    def get_prompt(self, id):
-        if not id:
-            return ""
-        if id not in prompt_bindings.keys():
+    def on_edge(self, pin):
+        # Hard IRQ handler for the key pins, must not allocate.
+        # listen() wakes from machine.idle() and scans the keys, scan_task() from the flag.
+        if not self._edge:
+            if not self.debouncer.busy:
+                self._edge_us = time.ticks_us()
+            self._edge = True
+        if self._edge_flag:
+            self._edge_flag.set()
+
+    def send_report(self, report_data, timeout_ms=100):
+        # Time the wait for the interrupt endpoint, to pace the typing.
+        # HIDInterface.send_report() returns None once the report is queued.
+        start = time.ticks_us()
+        pump = self.pump
+        if self.nkro:
+            if self.protocol:
+                reports = self._nkro_reports
+                reports[0], reports[1] = reports[1], reports[0]
+                report_data = nkro_report(reports[0], report_data)
+            elif self._commands is None:
+                pump = None  # boot protocol: 8-byte reports, sent directly unless core 1 types
+        if pump is not None:
+            ok = self.pump_report(report_data, timeout_ms)
+        else:
+            ok = super().send_report(report_data, timeout_ms) is not False
+        self.pacer.observe(time.ticks_diff(time.ticks_us(), start) + self.waited_us, ok)
+        self.waited_us = 0
+        return ok
+
+    def pump_report(self, report_data, timeout_ms) -> bool:
+        # Queue a copy of the report, waiting for a free buffer for up to timeout_ms
+        deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+        while not self.pump.put(report_data):
+            if not self.is_open() or time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+                return False
+            if self._commands is None:
+                self.pump.kick()
+            machine.idle()
+        return True
+
+    def ready(self) -> bool:
+        # a report can be sent without waiting
+        return self.pump.free() > 0 if self.pump is not None else not self.busy()
+
+    async def wait_ready(self):
+        # Yield to the other tasks until the interrupt endpoint can take a report
+        start = time.ticks_us()
+        while not self.is_open() or not self.ready():
+            await asyncio.sleep_ms(0 if self.is_open() else 100)
+        self.waited_us = time.ticks_diff(time.ticks_us(), start)
+
+    def send_raw_report(self, report, timeout_ms=100) -> bool:
+        # Send a complete 8-byte keyboard report as is, such as a memoryview slice of
+        # a prebuilt report stream, skipping the keycode handling of send_keys().
+        # The pump copies it, otherwise it is submitted directly and must not change
+        # until the next report was sent.
+        if ok := self.send_report(report, timeout_ms):
+            self._raw_report = report
+        return ok
+
+    async def send_keys_async(self, down_keys) -> bool:
+        # send_keys() that yields while the previous report is pending
+        await self.wait_ready()
+        return self.send_keys(down_keys)
+
+    def is_burst(self, id) -> bool:
+        burst = self.options["burst"]
+        return burst is True or (isinstance(burst, (list, tuple)) and id in burst)
+
+    def compile_prompts(self):
+        # Compile all bindings up front, so the first report goes out without compile latency.
+        # Each binding keeps its compiled reports, within the cache budget, and the
+        # options a key press needs are read once: a press does no lookups.
+        options = self.options
+        self._delay_option = options["delay"]
+        self._echo_option = options["echo"]
+        self._cancel_key = options["cancel_key"]
+        self._preempt_cancel = options["preempt"] == "cancel"
+        self.cache.clear()
+        set_layout(options["layout"])
+        set_typematic(options["typematic"])
+        set_unicode(options["unicode"], binding_texts(prompt_bindings))
+        self.bindings = [
+            Binding(prompt_bindings[id], self.is_burst(id)) if id in prompt_bindings else None for _, id in self.keys
+        ]
+        kept = 0  # bytes of reports the bindings keep, evicting them from the cache would not free them
+        for binding in self.bindings:
+            if binding:
+                steps = []
+                for prompt in binding.prompts:
+                    reports = self.cache.get(prompt, binding.burst)
+                    if reports is not None and kept + len(reports) > self.CACHE_BYTES:
+                        reports = None
+                    if reports is not None:
+                        kept += len(reports)
+                    steps.append(reports)
+                binding.reports = tuple(steps)
+        log.debug(f"Compiled {len(self.cache)} prompts into {self.cache.size} bytes")
+
+    def start_prompt(self, prompt: str, delay=None, burst: bool = False, reports=None):
+        # Start typing a prompt, the reports are sent by type_step().
+        # reports: the prompt compiled with burst, when the caller has them
+        if burst and self.nkro and self.protocol:
+            # the NKRO bitmap loses the order of the keys in a report, "ba" would type "ab"
+            burst = False
+            reports = None
+        chunks = (reports,) if reports is not None else self.cache.chunks(prompt, burst)
+        self.typist.start(chunks, self._delay_option if delay is None else delay, self._echo_option)
+        if self._start_flag and self.typist.is_typing():
+            self._start_flag.set()
+
+    def type_step(self):
+        self.typist.step()
+
+    def is_typing(self) -> bool:
+        return self.typist.is_typing()
+
+    def cancel_prompt(self):
+        # Stop typing between two reports, all keys are released
+        if self._commands is not None:
+            self.command(("cancel",))
+        else:
+            self.typist.cancel()
+
+    def is_busy(self) -> bool:
+        # typing, or about to: core 1 has a command queued or is starting a prompt
+        if self._commands is None:
+            return self.is_typing()
+        with self._lock:
+            return self._busy or len(self._commands) > 0
+
+    def send_prompt(self, prompt: str, delay=None, burst: bool = False):
+        # Type a prompt, blocking until it is done or cancelled by a key
+        self.start_prompt(prompt, delay, burst)
+        while self.is_typing():
+            self.type_step()
+            if self.scan_due():
+                self.scan()
+            machine.idle()
+
+    def scan_due(self) -> bool:
+        # a key changed or bounces, a press waits for its prompt, or a held matrix
+        # key hides the edges of the other keys on its sense line
+        return self._edge or self.debouncer.busy or len(self.events) > 0 or self._scan_held and self.debouncer.state != 0
+
+    def scan(self):
+        # One scan tick, at most once per ms: debounce all keys in one pass and
+        # queue every key that was pressed
+        now = time.ticks_ms()
+        if now == self._scan_ms:
+            return
+        self._scan_ms = now
+        self._edge = False
+        changed = self.debouncer.update(self.scanner.scan())
+        if pressed := changed & self.debouncer.state:
+            for i in range(len(self.keys)):
+                if pressed & (1 << i):
+                    self.press(i)
+        if len(self.events) and not self.is_busy():
+            i = self.events.get()
+            self.typist.press_us = self.events.ticks_us
+            self.start_key(i)
+
+    def press(self, i: int):
+        # A key was pressed: cancel, preempt or queue
+        id = self.keys[i][1]
+        if id == self._cancel_key:
+            self.events.clear()
+            self.cancel_prompt()
+            return
+        if self._preempt_cancel and self.is_busy():
+            self.events.clear()
+            self.cancel_prompt()
+        if not self.events.put(i, self._edge_us):
+            log.warning(f"Key queue full, dropped {self.events.overflows} presses")
+
+    def start_key(self, i: int):
+        # Send Macro
+        if not (binding := self.bindings[i]):
             log.warning("No macro defined for this key")
-            return ""
-
-        if isinstance(prompt_bindings[id], str):
-            # single prompt
-            prompt = prompt_bindings[id]
-        elif isinstance(prompt_bindings[id], list):
-            # multi-step prompt, use key_state to track progress through the steps
-            if self.key_state[id] < len(prompt_bindings[id]):
-                prompt = prompt_bindings[id][self.key_state[id]]
-                if not prompt.endswith(" ") or prompt.endswith("."):
-                    prompt += " "
-                self.key_state[id] += 1
-            else:
-                self.key_state[id] = 0
-                prompt = ".\n"
-        return prompt
-
-    def send_prompt(self, prompt: str, delay: int = DEF_DELAY):
-        macro_chords = as_keychords(prompt, delay)
-        if macro_chords:
-            for chord in macro_chords:
-                if isinstance(chord, int):
-                    self.send_keys([chord])
-                elif isinstance(chord, tuple):
-                    self.send_keys(chord)
-                else:
-                    # waited - avoid repeating the last key during long delays
-                    self.send_keys([])
-                    continue
-            # avoid repeating the last key after the end of the macro
-            self.send_keys([])
+            self.typist.press_us = None
+            return
+        step = binding.next_step()
+        prompt, reports = binding.prompts[step], binding.reports[step]
+        if self._commands is not None:
+            self.command(("start", prompt, binding.burst, reports))
+        else:
+            self.start_prompt(prompt, burst=binding.burst, reports=reports)
 
-    def listen(self) -> NoReturn:
+    def check_options(self, options: dict):
+        # the options that compile_prompts() does not use
+        delay = options["delay"]
+        assert delay == "auto" or isinstance(delay, int), "delay: ms, negative for a random delay, or \"auto\""
+        assert isinstance(options["echo"], int) and options["echo"] >= 0, "echo: reports between probes, 0 for none"
+        assert options["preempt"] in ("queue", "cancel"), "preempt: \"queue\" or \"cancel\""
+        assert isinstance(options["burst"], (bool, list, tuple)), "burst: True, False or a list of key ids"
+
+    def apply_config(self, update) -> bool:
+        # Use the prompts and options of a config file. A file with a bad option or
+        # prompt is not used, the previous bindings, options and layout are kept:
+        # a live reload must not stop the board.
         global prompt_bindings
+        if update is None:
+            return False
+        previous = prompt_bindings, self.options
+        prompt_bindings, self.options = config_values(update, prompt_bindings, self.OPTIONS)
+        try:
+            self.check_options(self.options)
+            self.compile_prompts()
+            return True
+        except Exception as e:
+            log.error(f"Config not used, keeping the previous one: {e}")
+            prompt_bindings, self.options = previous
+            self.compile_prompts()
+            return False
 
-        counter = 0
+    def reload_config(self):
+        # only a changed file is executed and its prompts compiled
+        if self.apply_config(self.config.read()):
+            log.info(f"Reloaded {self.config.filepath} in {self.config.reload_us} us")
+
+    def listen(self) -> NoReturn:
+        reload_at = time.ticks_add(time.ticks_ms(), self.RELOAD_MS)
         while True:
             if self.is_open():
-                for pin, id in KEYS:
-                    if self.is_pressed(pin):  # active-high
-                        # Send Macro
-                        prompt = self.get_prompt(id)
-                        self.send_prompt(prompt)
-                        break
-
+                # typing is interleaved with the rest of the loop, unless core 1 types
+                if self._commands is None:
+                    self.type_step()
+                else:
+                    self.pump.kick()  # core 0 submits the reports that core 1 queued
+                if self.scan_due():
+                    self.scan()
             else:
                 print("Keyboard not open")
-            # This simple example scans each input in an infinite loop, but a more
-            # complex implementation would probably use a timer or similar.
-            time.sleep_ms(1)
-            # Update the layout every 1000 iterations
-            counter += 1
-            if counter % 1000 == 0:
-                prompt_bindings = update_prompts(prompt_bindings, "/config.py")
-                counter = 0
+            # Check the config file every second
+            if time.ticks_diff(time.ticks_ms(), reload_at) >= 0:
+                reload_at = time.ticks_add(time.ticks_ms(), self.RELOAD_MS)
+                # core 1 compiles while it types, with the current layout
+                if self._commands is None or not self.is_busy():
+                    self.reload_config()
+                if not self.is_busy():
+                    self.pacer.save()  # flash is written between prompts, and from this core only
+            if not self._edge:
+                # sleep until the next interrupt (a key edge, USB) or for at most 1 ms.
+                # lightsleep would stop the USB controller.
+                machine.idle()
+
+    # Dual core mode: core 0 scans, debounces, updates the LEDs and reloads the
+    # config, core 1 compiles and types the prompts it gets through a command queue
+
+    def start_core1(self):
+        # all USB transfers are submitted on core 0, core 1 queues its reports in the pump
+        if self.pump is None:
+            self.pump = ReportPump(self, 2, NKRO_REPORT_LEN if self.nkro else 8)
+        self.pump.kick_on_put = False
+        self._lock = _thread.allocate_lock()
+        self._commands = []
+        _thread.start_new_thread(self.type_core1, ())
+
+    def command(self, command: tuple):
+        with self._lock:
+            self._commands.append(command)
+
+    def type_core1(self):
+        typist = self.typist
+        while True:
+            if self._commands:
+                with self._lock:
+                    command = self._commands.pop(0)
+                    self._busy = True
+                if command[0] == "start":
+                    self.start_prompt(command[1], burst=command[2], reports=command[3])
+                else:
+                    typist.cancel()
+            if typist.is_typing() or typist.pending():
+                typist.step()
+            if not typist.is_typing():
+                if self._busy:
+                    with self._lock:
+                        self._busy = False
+                time.sleep_ms(1)
+
+    # asyncio runtime: scanning, typing, LEDs and config reload run as separate tasks
+
+    async def scan_task(self):
+        while True:
+            if not self.scan_due():
+                await self._edge_flag.wait()
+            self.scan()
+            await asyncio.sleep_ms(1)
+
+    async def type_task(self):
+        typist = self.typist
+        while True:
+            if typist.event is None:
+                if typist.pending():
+                    await asyncio.sleep_ms(10)
+                    typist.step()
+                else:
+                    await self._start_flag.wait()
+                continue
+            if (wait := time.ticks_diff(typist.deadline(), time.ticks_ms())) > 0:
+                await asyncio.sleep_ms(wait)
+            if typist.echo_pending():
+                await asyncio.sleep_ms(1)  # let the other tasks run until the host echoes the probe
+                continue
+            await self.wait_ready()
+            typist.step()
+
+    async def led_task(self):
+        while True:
+            await self._led_flag.wait()
+            self.show_leds()
+
+    async def reload_task(self):
+        while True:
+            await asyncio.sleep_ms(self.RELOAD_MS)
+            self.reload_config()
+            if not self.is_typing():
+                self.pacer.save()
+
+    async def run(self):
+        self._edge_flag = asyncio.ThreadSafeFlag()
+        self._start_flag = asyncio.ThreadSafeFlag()
+        self._led_flag = asyncio.ThreadSafeFlag()
+        await asyncio.gather(self.scan_task(), self.type_task(), self.led_task(), self.reload_task())
 
 
 def run_keyboard():
 
     # Register the keyboard interface and re-enumerate
-    hid_kb = PromptBoard(KEYS, LEDS)
+    hid_kb = PromptBoard(KEYS, LEDS, MATRIX, NKRO)
     usb.device.get().init(hid_kb, builtin_driver=True)
+    if DUAL_CORE:
+        hid_kb.start_core1()
     log.info("Entering keyboard loop...")
     show_key_state()
     hid_kb.listen()
 
 
-run_keyboard()
+def run_keyboard_async():
+    # Register the keyboard interface and re-enumerate
+    hid_kb = PromptBoard(KEYS, LEDS, MATRIX, NKRO)
+    usb.device.get().init(hid_kb, builtin_driver=True)
+    log.info("Entering asyncio keyboard loop...")
+    show_key_state()
+    asyncio.run(hid_kb.run())
+
+
+if USE_ASYNCIO:
+    run_keyboard_async()
+else:
+    run_keyboard()
@@ -0,0 +1,42 @@
+# Generated by tools/gen_layouts.py, do not edit
+# German (QWERTZ) keyboard layout
+
+MODS = (  # modifier mask per character code, 0x80: dead key
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x02\x02\x00\x02\x02\x02\x02\x02\x02\x02\x00\x00\x00\x00\x02"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x02\x00\x02\x02\x02"
+    b"\x40\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02"
+    b"\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x40\x40\x40\x80\x02"
+    b"\x82\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x40\x40\x40\x40\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x02\x00\x40\x40\x80\x40\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x02\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+)
+KEYS = (  # keycode per character code, 0 if not on the layout
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x2b\x28\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x2c\x1e\x1f\x32\x21\x22\x23\x32\x25\x26\x30\x30\x36\x38\x37\x24"
+    b"\x27\x1e\x1f\x20\x21\x22\x23\x24\x25\x26\x37\x36\x64\x27\x64\x2d"
+    b"\x14\x04\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f\x10\x11\x12"
+    b"\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1d\x1c\x25\x2d\x26\x35\x38"
+    b"\x2e\x04\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f\x10\x11\x12"
+    b"\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1d\x1c\x24\x64\x27\x30\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x20\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x35\x00\x1f\x20\x2e\x10\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x34\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x33\x00\x00\x00\x00\x00\x2f\x00\x00\x2d"
+    b"\x00\x00\x00\x00\x34\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x33\x00\x00\x00\x00\x00\x2f\x00\x00\x00"
+)
+EXTRA = (  # code point (2 bytes), modifier mask, keycode
+    b"\x20\xac\x40\x08"
+)
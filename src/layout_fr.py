@@ -0,0 +1,42 @@
+# Generated by tools/gen_layouts.py, do not edit
+# French (AZERTY) keyboard layout
+
+MODS = (  # modifier mask per character code, 0x80: dead key
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x40\x00\x02\x00\x00\x00\x00\x00\x02\x00\x00\x02\x02"
+    b"\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x00\x00\x00\x00\x02\x02"
+    b"\x40\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02"
+    b"\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x40\x40\x40\x40\x00"
+    b"\xc0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x40\x40\x40\xc0\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x02\x40\x00\x00\x02\x82\x00\x00\x00\x00\x00\x00\x00"
+    b"\x02\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+)
+KEYS = (  # keycode per character code, 0 if not on the layout
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x2b\x28\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x2c\x38\x20\x20\x30\x34\x1e\x21\x22\x2d\x32\x2e\x10\x23\x36\x37"
+    b"\x27\x1e\x1f\x20\x21\x22\x23\x24\x25\x26\x37\x36\x64\x2e\x64\x10"
+    b"\x27\x14\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f\x33\x11\x12"
+    b"\x13\x04\x15\x16\x17\x18\x19\x1d\x1b\x1c\x1a\x22\x25\x2d\x26\x25"
+    b"\x24\x14\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f\x33\x11\x12"
+    b"\x13\x04\x15\x16\x17\x18\x19\x1d\x1b\x1c\x1a\x21\x23\x2e\x1f\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x30\x30\x00\x00\x38\x2f\x00\x00\x00\x00\x00\x00\x00"
+    b"\x2d\x00\x35\x00\x00\x32\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x27\x00\x00\x00\x00\x00\x00\x26\x24\x1f\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x34\x00\x00\x00\x00\x00\x00"
+)
+EXTRA = (  # code point (2 bytes), modifier mask, keycode
+    b"\x20\xac\x40\x08"
+)
@@ -0,0 +1,42 @@
+# Generated by tools/gen_layouts.py, do not edit
+# US-International (QWERTY), for Dutch keyboard layout
+
+MODS = (  # modifier mask per character code, 0x80: dead key
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x02\x82\x02\x02\x02\x02\x80\x02\x02\x02\x02\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x02\x00\x02\x02"
+    b"\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02"
+    b"\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x02\x00\x00\x00\x82\x02"
+    b"\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x02\x02\x82\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x40\x42\x42\x40\x00\x00\x42\x00\x40\x00\x40\x00\x00\x40\x00"
+    b"\x42\x00\x40\x40\x00\x40\x40\x00\x00\x42\x00\x40\x00\x00\x00\x40"
+    b"\x00\x42\x00\x00\x42\x42\x42\x42\x00\x42\x00\x00\x00\x42\x00\x00"
+    b"\x00\x42\x00\x42\x00\x00\x42\x40\x42\x00\x42\x00\x42\x00\x00\x40"
+    b"\x00\x40\x00\x00\x40\x40\x40\x40\x00\x40\x00\x00\x00\x40\x00\x00"
+    b"\x00\x40\x00\x40\x00\x00\x40\x42\x40\x00\x40\x00\x40\x00\x00\x00"
+)
+KEYS = (  # keycode per character code, 0 if not on the layout
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x2b\x28\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x2c\x1e\x34\x20\x21\x22\x24\x34\x26\x27\x25\x2e\x36\x2d\x37\x38"
+    b"\x27\x1e\x1f\x20\x21\x22\x23\x24\x25\x26\x33\x33\x36\x2e\x37\x38"
+    b"\x1f\x04\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f\x10\x11\x12"
+    b"\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1c\x1d\x2f\x31\x30\x23\x2d"
+    b"\x35\x04\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f\x10\x11\x12"
+    b"\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1c\x1d\x2f\x31\x30\x35\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x1e\x06\x21\x21\x00\x00\x16\x00\x06\x00\x2f\x00\x00\x15\x00"
+    b"\x33\x00\x1f\x20\x00\x10\x33\x00\x00\x1e\x00\x30\x00\x00\x00\x38"
+    b"\x00\x04\x00\x00\x14\x1a\x1d\x36\x00\x08\x00\x00\x00\x0c\x00\x00"
+    b"\x00\x11\x00\x12\x00\x00\x13\x2e\x0f\x00\x18\x00\x1c\x00\x00\x16"
+    b"\x00\x04\x00\x00\x14\x1a\x1d\x36\x00\x08\x00\x00\x00\x0c\x00\x00"
+    b"\x00\x11\x00\x12\x00\x00\x13\x2e\x0f\x00\x18\x00\x1c\x00\x00\x00"
+)
+EXTRA = (  # code point (2 bytes), modifier mask, keycode
+    b"\x20\x18\x40\x26\x20\x19\x40\x27\x20\xac\x40\x22"
+)
@@ -8,141 +8,594 @@ Translate text to keycodes for USB HID devices.
 # MIT License
 
 import random
+import sys
 import time
 
-from textwrap_dedent import dedent
+from micropython import const
 from usb.device.keyboard import KeyCode as KC
 
-a_to_z = range(ord("a"), ord("z") + 1)
-one_to_nine = range(ord("1"), ord("9") + 1)
-
-charmap = {
-    # additional Common Keys
-    9: KC.TAB,  # \t
-    # 10: KC.ENTER
-    10: (
-        KC.LEFT_SHIFT,
-        KC.ENTER,
-    ),  # Shift-Enter gives LF without Sending(Enter) the prompt in Copilot
-    32: KC.SPACE,
-    33: (KC.LEFT_SHIFT, KC.N1),  # !
-    34: (KC.LEFT_SHIFT, KC.QUOTE),  # "
-    35: (KC.HASH),  # #
-    36: (KC.LEFT_SHIFT, KC.N4),  # $
-    37: (KC.LEFT_SHIFT, KC.N5),  # %
-    38: (KC.LEFT_SHIFT, KC.N7),  # &
-    39: (KC.QUOTE),  # '
-    40: (KC.LEFT_SHIFT, KC.N9),  # (
-    41: (KC.LEFT_SHIFT, KC.N0),  # )
-    42: (KC.LEFT_SHIFT, KC.N8),  # *
-    43: (KC.LEFT_SHIFT, KC.EQUAL),  # +
-    44: KC.COMMA,  # ,
-    45: KC.MINUS,  # -
-    46: KC.DOT,  # .
-    47: KC.SLASH,  # /
-    58: (KC.LEFT_SHIFT, KC.COLON),
-    59: KC.COLON,
-    60: (KC.LEFT_SHIFT, KC.COMMA),  # <
-    61: KC.EQUAL,
-    62: (KC.LEFT_SHIFT, KC.DOT),  # >
-    63: (KC.LEFT_SHIFT, KC.SLASH),  # ?
-    64: (KC.LEFT_SHIFT, KC.N2),  # @,
-    91: KC.OPEN_BRACKET,  # [
-    92: KC.BACKSLASH,  # \
-    93: KC.CLOSE_BRACKET,  # ]
-    94: (KC.LEFT_SHIFT, KC.N6),  # ^
-    95: (KC.LEFT_SHIFT, KC.MINUS),  # _
-    123: (KC.LEFT_SHIFT, KC.OPEN_BRACKET),  # {
-    124: (KC.LEFT_SHIFT, KC.BACKSLASH),  # |
-    125: (KC.LEFT_SHIFT, KC.CLOSE_BRACKET),  # }
-    126: (KC.LEFT_SHIFT, KC.TILDE),  # ` ~
-    163: (KC.LEFT_SHIFT, KC.N3),  # £
-}
+# Lookup tables indexed by character code, from the selected layout_<name> module
+MODS = b""  # modifier mask, DEAD if the key is a dead key
+KEYS = b""  # keycode, 0 if the character is not on the layout
+EXTRA = b""  # characters above 0xFF: code point (2 bytes), modifier mask, keycode
+layout = None
 
 
-DO_NOTHING = -1
+def set_layout(name: str = "us"):
+    """
+    Select the keyboard layout of the host.
+    :param name: The layout, from a layout_<name> module generated by tools/gen_layouts.py.
+        Only the selected layout is kept in memory.
+    """
+    global MODS, KEYS, EXTRA, layout
+    if name == layout:
+        return
+    try:
+        module = __import__("layout_" + name)
+    except ImportError:
+        raise ValueError(f"set_layout: unknown layout {name}")
+    MODS, KEYS, EXTRA = module.MODS, module.KEYS, module.EXTRA
+    if layout:
+        sys.modules.pop("layout_" + layout, None)
+    layout = name
 
 
-def wait(delay: int):
-    if delay == 0:
-        return
-    if delay < 0:
-        delay = random.randint(5, -delay)
+set_layout()
 
-    t_until = time.ticks_ms() + delay
 
-    while time.ticks_diff(t_until, time.ticks_ms()) > 0:
-        time.sleep_ms(1)
-        # yield DO_NOTHING
+PAUSE = const(0xFF)  # keycode marking the end of a character in a compiled stream
+DEAD = const(0x80)  # modifier flag in the layout tables: type a space after the key
+HOLD = const(0xFE)  # keycode of a record that holds the previous report for n * HOLD_MS
+HOLD_MS = const(10)
+MORE = const(0x80)  # keycode flag: the next key goes into the same report (burst mode)
+KEY_ARRAY_LEN = const(6)  # keys per report, must match usb.device.keyboard
+_RELEASE_PAUSE = b"\x00\x00\x00\xff"
+_SHIFT = const(0x02)  # modifier mask of the capitals on the layouts
+_CAPS_LOCK_TAP = bytes((0, KC.CAPS_LOCK, 0, 0))  # records: press and release Caps Lock
+_CAPITALS_MAX = const(64)  # characters of a run of capitals compiled both ways at once
+typematic = None  # host auto-repeat: (delay_ms, rate, shortest run), see set_typematic()
 
+# Unicode input for characters that are not on the keyboard. The key sequence
+# for each code point in the prompts is precomputed by set_unicode().
+UNICODE_STRATEGIES = ("ascii", "windows", "linux")
+unicode_records = {}  # code point: compiled records, ending with a release and PAUSE
 
-def hold(key, delay: int, auto_release=True):
-    t_until = time.ticks_ms() + delay
-    while time.ticks_diff(t_until, time.ticks_ms()) > 0:
-        yield key
-    if auto_release:
-        yield 0
+# Windows code page 1252, 0x80-0x9F, for Alt+0nnn input
+_CP1252 = "€\x81‚ƒ„…†‡ˆ‰Š‹Œ\x8dŽ\x8f\x90‘’“”•–—˜™š›œ\x9džŸ"
 
+_ASCII = {
+    "‘": "'",
+    "’": "'",
+    "‚": ",",
+    "“": '"',
+    "”": '"',
+    "„": '"',
+    "«": '"',
+    "»": '"',
+    "‹": "<",
+    "›": ">",
+    "–": "-",
+    "—": "-",
+    "…": "...",
+    "•": "*",
+    "·": ".",
+    "×": "x",
+    "÷": "/",
+    "°": " degrees",
+    "€": "EUR",
+    "©": "(c)",
+    "®": "(R)",
+    "£": "GBP",
+    "™": "TM",
+    "\xa0": " ",
+    "ß": "ss",
+    "æ": "ae",
+    "Æ": "AE",
+    "œ": "oe",
+    "Œ": "OE",
+    "ĳ": "ij",
+    "Ĳ": "IJ",
+}
+_ACCENTED = (
+    ("àáâãäåā", "a"),
+    ("ÀÁÂÃÄÅĀ", "A"),
+    ("çćč", "c"),
+    ("ÇĆČ", "C"),
+    ("èéêëēė", "e"),
+    ("ÈÉÊËĒĖ", "E"),
+    ("ìíîïī", "i"),
+    ("ÌÍÎÏĪ", "I"),
+    ("ñń", "n"),
+    ("ÑŃ", "N"),
+    ("òóôõöøō", "o"),
+    ("ÒÓÔÕÖØŌ", "O"),
+    ("šś", "s"),
+    ("ŠŚ", "S"),
+    ("ùúûüū", "u"),
+    ("ÙÚÛÜŪ", "U"),
+    ("ýÿ", "y"),
+    ("ÝŸ", "Y"),
+    ("žźż", "z"),
+    ("ŽŹŻ", "Z"),
+)
+
+
+def hold(stream: bytearray, mod: int, key: int, times: int):
+    # Append records that hold the key down until the host's auto-repeat typed it times times
+    delay_ms, rate = typematic[0], typematic[1]
+    # the first repeat comes after delay_ms, aim for the middle of the last repeat period
+    units = (delay_ms + (times - 2) * 1000 // rate + 500 // rate + HOLD_MS // 2) // HOLD_MS
+    if mod:
+        stream.append(mod)
+        stream.append(0)
+    stream.append(mod)
+    stream.append(key)
+    while units:
+        n = min(units, 0xFF)
+        stream.append(n)
+        stream.append(HOLD)
+        units -= n
+    stream.extend(_RELEASE_PAUSE)
 
-def repeat(key, times, delay: int = 0):
+
+def repeat(stream: bytearray, mod: int, key: int, times: int, last_key=None, held: int = 0):
+    # Append records that type the key times times, after a key typed with the modifiers held.
+    # The modifiers stay down between the presses, and for the next key if it shares them.
     for _ in range(times):
-        yield key
-        yield 0
-        yield wait(delay)
-
-
-def scancode(char: str):
-    assert len(char) == 1, "scancode: Only single characters are supported"
-    upper = char.isupper()
-    char_ = ord(char.lower())
-    if char_ in a_to_z:
-        if upper:
-            return KC.LEFT_SHIFT, char_ - 97 + KC.A
+        if key == last_key or (mod and mod != held):
+            stream.append(mod)
+            stream.append(0)
+        last_key = key
+        held = mod
+        stream.append(mod)
+        stream.append(key)
+        stream.append(mod)
+        stream.append(PAUSE)
+
+
+def set_typematic(value=None):
+    """
+    Set the host's auto-repeat, to type long runs of the same character by holding the key.
+    :param value: None to type every character, or (delay_ms, rate) with the delay before
+        the first repeat and the repeats per second, optionally followed by the shortest
+        run to hold (default 8).
+    """
+    global typematic
+    if value:
+        assert value[0] > 0 and value[1] > 0, "set_typematic: delay and rate must be positive"
+        value = (value[0], value[1], value[2] if len(value) > 2 else 8)
+    typematic = value
+
+
+def normalized(text: str):
+    """
+    Normalize the margins of a prompt in a single pass, without copying it.
+    :param text: The text to normalize.
+
+    :return: A generator that yields the characters of text, without leading
+        blank lines and with the indent of the first line removed from the start
+        of every line. Whitespace-only lines become empty lines.
+    """
+    indent = -1  # leading whitespace of the first line, -1 until it is known
+    col = 0  # whitespace seen at the start of the current line
+    pending = ""  # whitespace beyond the indent, kept until the line turns out not blank
+    in_line = False  # past the leading whitespace of the current line
+    for char in text:
+        if in_line:
+            yield char
+            if char == "\n":
+                in_line = False
+                col = 0
+        elif char == " " or char == "\t":
+            if 0 <= indent <= col:
+                pending += char
+            col += 1
+        elif char == "\n" or (char == "\r" and indent < 0):
+            # blank line
+            if indent >= 0:
+                yield char
+            pending = ""
+            col = 0
         else:
-            return char_ - 97 + KC.A
-    elif char_ in one_to_nine:
-        return char_ - 49 + KC.N1
-    elif char_ == 48:
-        return KC.N0
-    elif k := charmap.get(char_):
-        return k
+            if indent < 0:
+                indent = col
+            if pending:
+                yield from pending
+                pending = ""
+            yield char
+            in_line = True
+
+
+def compile_keychords(text: str, burst: bool = False) -> bytearray:
+    """
+    Compile text into the keyboard reports that type it.
+    :param text: The text to translate.
+    :param burst: Pack runs of distinct keys that share a modifier into one report.
+
+    :return: A bytearray of records, told apart by their second byte, which is
+        the reserved byte of a keyboard report:
+        0: an 8-byte keyboard report, sent as is.
+        PAUSE: 2 bytes (modifier mask, PAUSE) at the end of each character, where
+        the inter-key delay and a release report go. The release keeps the
+        modifiers held, so a run of shifted characters presses Shift only once.
+        HOLD: 2 bytes (n, HOLD) that keep the previous report down for
+        n * HOLD_MS, for the host's auto-repeat, see set_typematic().
+        Stretches of capitals are typed holding Shift or with Caps Lock on,
+        whichever takes fewer reports. Typing assumes Caps Lock is off.
+    """
+    assert isinstance(text, str), f"compile_keychords: text must be a string not {type(text)}"
+    stream = bytearray()
+    if burst:
+        _compile_burst(stream, _capitals(_runs(normalized(text))))
     else:
-        return 0
+        _compile_chars(stream, _capitals(_runs(normalized(text))))
+    return _reports(stream)
 
 
-def as_keychords(text: str, delay: int = -100):
+def iter_keychords(text: str, burst: bool = False, size: int = 256):
     """
-    Translate text to keycodes for USB HID devices.
+    Compile text in chunks, for prompts that are too big to compile at once.
     :param text: The text to translate.
-    :param delay: The delay between each key press.
+    :param burst: See compile_keychords().
+    :param size: The approximate size of each chunk in bytes.
 
-    :return: A generator that yields keycodes, tuples of keycodes.
+    :return: A generator that yields compiled reports, see compile_keychords(),
+        each chunk ending with all keys released. The first chunk is ready after
+        compiling about size bytes of records, whatever the length of the text.
     """
-    assert isinstance(text, str), f"as_keychords: text must be a string not {type(text)}"
+    assert isinstance(text, str), f"iter_keychords: text must be a string not {type(text)}"
+    runs = _capitals(_runs(normalized(text)))
+    while True:
+        stream = bytearray()
+        if burst:
+            _compile_burst(stream, runs, size)
+        else:
+            _compile_chars(stream, runs, size)
+        if not stream:
+            return
+        yield _reports(stream)
 
-    # trim leading empty lines
-    text = dedent(text.lstrip("\r\n"))
 
-    # unindent text
-    lines = text.split("\n")
-    indent = len(lines[0]) - len(lines[0].lstrip())
-    text = "\n".join(line[indent:] for line in lines)
+def _runs(chars):
+    # yields (char, count) for each run of the same character
+    run_char = None
+    run = 0
+    for char in chars:
+        if char == run_char:
+            run += 1
+            continue
+        if run:
+            yield run_char, run
+        run_char = char
+        run = 1
+    if run:
+        yield run_char, run
 
-    # delay = max(0, delay)
-    last_key = None
-    for char in text:
-        sc = scancode(char)
-        if isinstance(sc, tuple):
-            mod, key = sc
-            if key == last_key:
-                yield 0
-            last_key = key
-            yield mod
-            yield mod, key
+
+def _capitals(runs):
+    # yields the runs, gathering stretches of capitals and spaces into (None, runs)
+    # items that are typed holding Shift or with Caps Lock on, see _compile_capitals()
+    stretch = []
+    chars = capitals = 0
+    for char, run in runs:
+        c = ord(char)
+        if c == 0x20 or 0x41 <= c <= 0x5A and MODS[c] == _SHIFT and not MODS[c + 0x20] and KEYS[c] == KEYS[c + 0x20]:
+            stretch.append((char, run))
+            chars += run
+            if c != 0x20:
+                capitals += run
+            if chars < _CAPITALS_MAX:
+                continue
+            char = None
+        if stretch:
+            # a few capitals don't pay for the 4 reports of the Caps Lock taps
+            if capitals > 4:
+                yield None, stretch
+            else:
+                yield from stretch
+            stretch.clear()
+            chars = capitals = 0
+        if char is not None:
+            yield char, run
+    if stretch:
+        if capitals > 4:
+            yield None, stretch
         else:
-            if sc == last_key:
-                yield 0
-            last_key = sc
-            yield sc
-        if delay:
-            yield wait(delay)
+            yield from stretch
+
+
+def _compile_capitals(stream: bytearray, runs, compile, *state):
+    # Append a stretch of capitals and spaces, typed holding Shift or, when that takes
+    # fewer reports, in lower case between two Caps Lock taps. Typing assumes Caps
+    # Lock is off, see typist.caps_lock_off(). Returns the state of compile() after the stretch.
+    shifted = bytearray()
+    after = compile(shifted, runs, 0, *state)
+    caps = bytearray(_CAPS_LOCK_TAP)
+    compile(caps, ((char.lower(), run) for char, run in runs))
+    caps.extend(_CAPS_LOCK_TAP)
+    if _report_count(caps) < _report_count(shifted):
+        stream.extend(caps)
+        return None
+    stream.extend(shifted)
+    return after
+
+
+def _report_count(stream: bytearray) -> int:
+    # reports sent for compiled records, with a release after each PAUSE
+    return sum(1 for i in range(1, len(stream), 2) if stream[i] == PAUSE or not stream[i] & MORE)
+
+
+def _holds(c: int, run: int) -> bool:
+    # type this run by holding the key and letting the host repeat it
+    return typematic is not None and run >= typematic[2] and not MODS[c] & DEAD
+
+
+def _compile_chars(stream: bytearray, runs, limit: int = 0, last_key=None, held: int = 0):
+    # compile runs of characters, until the stream holds limit bytes.
+    # held: modifiers held down after the last key
+    for char, run in runs:
+        if char is None:
+            last_key, held = _compile_capitals(stream, run, _compile_chars, last_key, held) or (None, 0)
+            continue
+        c = ord(char)
+        if c > 0xFF or not KEYS[c] or MODS[c] & DEAD:
+            if (records := _sequence(c)) is not None:
+                for _ in range(run):
+                    stream.extend(records)
+                last_key = None
+                held = 0
+                continue
+            mod = key = 0
+        else:
+            mod = MODS[c]
+            key = KEYS[c]
+            if _holds(c, run):
+                hold(stream, mod, key, run)
+                last_key = None
+                held = 0
+                continue
+        repeat(stream, mod, key, run, last_key, held)
+        last_key = key
+        held = mod
+        if limit and len(stream) >= limit:
+            stream.append(0)
+            stream.append(0)
+            return
+    return last_key, held
+
+
+def next_record(stream: bytearray, i: int) -> int:
+    # index of the record after the report that starts at stream[i]
+    while stream[i + 1] & MORE and stream[i + 1] < HOLD:
+        i += 2
+    return i + 2
+
+
+def _reports(stream: bytearray) -> bytearray:
+    # The compiled reports of a stream of 2-byte (modifier mask, keycode) records,
+    # where a keycode flagged with MORE continues into the next record's report
+    reports = bytearray()
+    i = 0
+    while i < len(stream):
+        key = stream[i + 1]
+        reports.append(stream[i])
+        reports.append(key if key >= HOLD else 0)
+        if key >= HOLD:
+            i += 2
+            continue
+        j = next_record(stream, i)
+        n = 0
+        for k in range(i + 1, j, 2):
+            if key := stream[k] & ~MORE:
+                reports.append(key)
+                n += 1
+        while n < KEY_ARRAY_LEN:
+            reports.append(0)
+            n += 1
+        i = j
+    return reports
+
+
+def keychord_events(reports: bytearray, delay=0):
+    """
+    Schedule compiled reports, without blocking.
+    :param reports: The compiled reports, see compile_keychords().
+    :param delay: The delay between characters in ms, negative for a random delay
+        up to -delay, or a function that returns the delay for the next character.
+
+    :return: A generator that yields (deadline_ticks, i) events: send the record
+        at reports[i] once time.ticks_ms() reaches the deadline. A PAUSE record
+        stands for the release report after the delay, which keeps the PAUSE
+        record's modifiers held, HOLD records only move the deadline.
+    """
+    deadline = time.ticks_ms()
+    i = 0
+    while i < len(reports):
+        if reports[i + 1] == HOLD:
+            # keep the last report down, the host's auto-repeat types the key
+            deadline = time.ticks_add(deadline, reports[i] * HOLD_MS)
+            i += 2
+        elif reports[i + 1] == PAUSE:
+            ms = delay() if callable(delay) else delay
+            if ms:
+                if ms < 0:
+                    ms = random.randint(5, -ms)
+                # don't let the reports that went out late eat into the delay
+                now = time.ticks_ms()
+                if time.ticks_diff(now, deadline) > 0:
+                    deadline = now
+                deadline = time.ticks_add(deadline, ms)
+                yield deadline, i
+            i += 2
+        else:
+            yield deadline, i
+            i += 8
+
+
+def _in_report(stream: bytearray, start: int, key: int) -> bool:
+    for i in range(start + 1, len(stream), 2):
+        if stream[i] & ~MORE == key:
+            return True
+    return False
+
+
+def _compile_burst(stream: bytearray, runs, limit: int = 0):
+    # Keys are added to the array in typing order, which is the order hosts
+    # report new keys from a single report. A key can't repeat within a report.
+    start = -1  # index of the first record of the open report
+    for char, run in runs:
+        if char is None:
+            if start >= 0:
+                stream.extend(_RELEASE_PAUSE)
+                start = -1
+            _compile_capitals(stream, run, _compile_burst)
+            continue
+        c = ord(char)
+        if c > 0xFF or not KEYS[c] or MODS[c] & DEAD or _holds(c, run):
+            if start >= 0:
+                stream.extend(_RELEASE_PAUSE)
+                start = -1
+            if c <= 0xFF and KEYS[c] and not MODS[c] & DEAD:
+                hold(stream, MODS[c], KEYS[c], run)
+            elif (records := _sequence(c)) is not None:
+                for _ in range(run):
+                    stream.extend(records)
+        else:
+            start = _burst(stream, start, MODS[c], KEYS[c], run)
+        if limit and len(stream) >= limit:
+            break
+    if start >= 0:
+        stream.extend(_RELEASE_PAUSE)
+
+
+def _burst(stream: bytearray, start: int, mod: int, key: int, run: int) -> int:
+    # add run presses of a key to the open report at stream[start], returns the open report
+    held = 0  # modifiers held down after the last report
+    for _ in range(run):
+        if start >= 0:
+            if (
+                mod == stream[start]
+                and len(stream) - start < 2 * KEY_ARRAY_LEN
+                and not _in_report(stream, start, key)
+            ):
+                stream[-1] |= MORE
+                stream.append(mod)
+                stream.append(key)
+                continue
+            # release the keys, keep the modifiers held for the next report
+            held = stream[start]
+            stream.append(held)
+            stream.append(0)
+            stream.append(held)
+            stream.append(PAUSE)
+        if mod and mod != held:
+            stream.append(mod)
+            stream.append(0)
+        start = len(stream)
+        stream.append(mod)
+        stream.append(key)
+    return start
+
+
+def _tap(stream: bytearray, mod: int, key: int):
+    # press and release key, leaving mod held
+    stream.append(mod)
+    stream.append(key)
+    stream.append(mod)
+    stream.append(0)
+
+
+def _key_sequence(mod: int, key: int) -> bytearray:
+    # records to type a single key, a dead key is followed by a space
+    stream = bytearray()
+    if mod & DEAD:
+        _tap(stream, mod & ~DEAD, key)
+        _tap(stream, 0, KC.SPACE)
+    else:
+        if mod:
+            stream.append(mod)
+            stream.append(0)
+        stream.append(mod)
+        stream.append(key)
+    stream.extend(_RELEASE_PAUSE)
+    return stream
+
+
+def _extra(c: int):
+    # (modifier mask, keycode) of a character above 0xFF on the layout, or None
+    for i in range(0, len(EXTRA), 4):
+        if EXTRA[i] << 8 | EXTRA[i + 1] == c:
+            return EXTRA[i + 2], EXTRA[i + 3]
+    return None
+
+
+def _sequence(c: int):
+    # the precomputed records for a character that is not typed with a single key
+    if (records := unicode_records.get(c)) is None and c <= 0xFF and KEYS[c]:
+        records = _key_sequence(MODS[c], KEYS[c])  # dead key
+    return records
+
+
+def transliterate(char: str) -> str:
+    # closest ASCII text for char, empty if there is none
+    if text := _ASCII.get(char):
+        return text
+    for accented, base in _ACCENTED:
+        if char in accented:
+            return base
+    return ""
+
+
+def unicode_sequence(char: str, strategy: str = "ascii") -> bytearray:
+    """
+    Compile the key sequence that enters a character that is not on the keyboard.
+    :param char: The character.
+    :param strategy: "windows" for Alt + numpad (needs Num Lock),
+        "linux" for Ctrl+Shift+U + hex code (IBus, GTK), or "ascii" to transliterate.
+        Characters that Windows can't enter with Alt+0nnn are transliterated.
+        Characters on the layout, like those on dead keys, are typed with their key.
+
+    :return: The compiled records, ending with a release and a PAUSE.
+    """
+    assert strategy in UNICODE_STRATEGIES, f"unicode_sequence: unknown strategy {strategy}"
+    c = ord(char)
+    if c <= 0xFF and KEYS[c]:
+        return _key_sequence(MODS[c], KEYS[c])
+    if key := _extra(c):
+        return _key_sequence(*key)
+    stream = bytearray()
+    if strategy == "windows" and (c <= 0xFF or char in _CP1252):
+        alt = -KC.LEFT_ALT
+        stream.append(alt)
+        stream.append(0)
+        for digit in "0%03d" % (c if c <= 0xFF else 0x80 + _CP1252.index(char)):
+            _tap(stream, alt, KC.KP_0 if digit == "0" else KC.KP_1 + ord(digit) - 49)
+    elif strategy == "linux":
+        _tap(stream, -(KC.LEFT_CTRL + KC.LEFT_SHIFT), KEYS[ord("u")])
+        for digit in "%x" % c:
+            _tap(stream, MODS[ord(digit)], KEYS[ord(digit)])
+        _tap(stream, 0, KC.SPACE)
+    else:
+        _compile_chars(stream, _runs(transliterate(char)))
+    stream.extend(_RELEASE_PAUSE)
+    return stream
+
+
+def set_unicode(strategy: str, texts):
+    """
+    Precompute the key sequences for the characters in texts that are not typed
+    with a single key of the current layout.
+    :param strategy: See unicode_sequence().
+    :param texts: An iterable of strings, usually all the prompts.
+    """
+    global unicode_records
+    assert strategy in UNICODE_STRATEGIES, f"set_unicode: unknown strategy {strategy}"
+    records = {}
+    for text in texts:
+        for char in text:
+            c = ord(char)
+            if c in records:
+                continue
+            if c > 0xFF or (c >= 0x80 and not KEYS[c]) or MODS[c] & DEAD:
+                records[c] = bytes(unicode_sequence(char, strategy))
+    unicode_records = records
@@ -0,0 +1,56 @@
+# NKRO keyboard reports: a modifier byte and a bitmap of all keys
+#
+# Used with a 1 ms polling interval. Hosts that switch to the boot protocol
+# (BIOS, boot loaders) get the standard 8-byte reports instead.
+
+from micropython import const
+
+NKRO_KEYS = const(120)  # keycodes 0-119 have a bit in the bitmap
+NKRO_REPORT_LEN = const(16)  # Modifier Byte + 15 bitmap bytes
+NKRO_POLL_MS = const(1)  # bInterval of the interrupt endpoint
+
+_EMPTY_REPORT = bytes(NKRO_REPORT_LEN)
+
+# fmt: off
+NKRO_REPORT_DESC = (
+    b'\x05\x01'     # Usage Page (Generic Desktop),
+        b'\x09\x06'     # Usage (Keyboard),
+    b'\xA1\x01'     # Collection (Application),
+        b'\x05\x07'         # Usage Page (Key Codes);
+            b'\x19\xE0'         # Usage Minimum (224),
+            b'\x29\xE7'         # Usage Maximum (231),
+            b'\x15\x00'         # Logical Minimum (0),
+            b'\x25\x01'         # Logical Maximum (1),
+            b'\x75\x01'         # Report Size (1),
+            b'\x95\x08'         # Report Count (8),
+            b'\x81\x02'         # Input (Data, Variable, Absolute), ;Modifier byte
+        b'\x05\x08'         # Usage Page (Page# for LEDs),
+            b'\x19\x01'         # Usage Minimum (1),
+            b'\x29\x05'         # Usage Maximum (5),
+            b'\x95\x05'         # Report Count (5),
+            b'\x75\x01'         # Report Size (1),
+            b'\x91\x02'         # Output (Data, Variable, Absolute), ;LED report
+            b'\x95\x01'         # Report Count (1),
+            b'\x75\x03'         # Report Size (3),
+            b'\x91\x01'         # Output (Constant), ;LED report padding
+        b'\x05\x07'         # Usage Page (Key Codes),
+            b'\x19\x00'         # Usage Minimum (0),
+            b'\x29\x77'         # Usage Maximum (119),
+            b'\x15\x00'         # Logical Minimum (0),
+            b'\x25\x01'         # Logical Maximum (1),
+            b'\x75\x01'         # Report Size (1),
+            b'\x95\x78'         # Report Count (120),
+            b'\x81\x02'         # Input (Data, Variable, Absolute), ;Key bitmap (15 bytes)
+    b'\xC0'     # End Collection
+)
+# fmt: on
+
+
+def nkro_report(buf: bytearray, report) -> bytearray:
+    # Fill buf with the NKRO report of an 8-byte boot report
+    buf[:] = _EMPTY_REPORT
+    buf[0] = report[0]
+    for i in range(2, 8):
+        if (key := report[i]) and key < NKRO_KEYS:
+            buf[1 + (key >> 3)] |= 1 << (key & 7)
+    return buf
@@ -0,0 +1,74 @@
+# Adaptive inter-key delay, learned from how long reports wait for the interrupt endpoint
+#
+# Waiting up to one polling interval for the endpoint is normal. Longer waits and
+# timeouts mean the host is falling behind: the delay is doubled. After a run of
+# characters without back-pressure the delay is lowered by 1 ms, so it converges
+# on the smallest delay the host can take. The learned delay survives a reboot.
+# Scroll Lock round trips have a limit of their own: a normal one takes longer
+# than any wait for the endpoint.
+
+
+class Pacer:
+    SPIN_LIMIT_US = 20_000  # more than two polling intervals at bInterval=8
+    ECHO_LIMIT_MS = 150  # a slower LED round trip means the host's input queue is backing up
+    CLEAN_RUN = 20  # characters without back-pressure before lowering the delay
+
+    def __init__(self, filepath: str = "/pacing.txt", min_ms: int = 0, max_ms: int = 50, start_ms: int = 10):
+        self.filepath = filepath
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.delay = start_ms
+        self.timeouts = 0  # total reports that timed out
+        self._spin_us = 0  # longest wait for the endpoint during the current character
+        self._timeout = False
+        self._echo_ms = 0  # slowest LED round trip during the current character
+        self._clean = 0
+        self.load()
+        self._saved = self.delay
+
+    def load(self):
+        try:
+            with open(self.filepath, "r") as file:
+                self.delay = min(self.max_ms, max(self.min_ms, int(file.read())))
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        # only write to flash when the learned delay changed
+        if self.delay == self._saved:
+            return
+        try:
+            with open(self.filepath, "w") as file:
+                file.write(str(self.delay))
+            self._saved = self.delay
+        except OSError as e:
+            print("Could not save pacing", e)
+
+    def observe(self, spin_us: int, ok: bool):
+        # record one report: the time spent waiting to queue it, and if it was queued
+        if spin_us > self._spin_us:
+            self._spin_us = spin_us
+        if not ok:
+            self._timeout = True
+            self.timeouts += 1
+
+    def observe_echo(self, ms: int):
+        # record the round trip of a Scroll Lock probe, from the press to the LED report
+        if ms > self._echo_ms:
+            self._echo_ms = ms
+
+    def next_delay(self) -> int:
+        # called at the end of each character, returns the delay before the next one
+        if self._timeout or self._spin_us > self.SPIN_LIMIT_US or self._echo_ms > self.ECHO_LIMIT_MS:
+            self.delay = min(self.max_ms, self.delay * 2 + 1)
+            self._clean = 0
+        else:
+            self._clean += 1
+            if self._clean >= self.CLEAN_RUN:
+                self._clean = 0
+                if self.delay > self.min_ms:
+                    self.delay -= 1
+        self._spin_us = 0
+        self._echo_ms = 0
+        self._timeout = False
+        return self.delay
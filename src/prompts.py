@@ -36,3 +36,13 @@ msft_prompts = {
 }
 
 prompts = msft_prompts
+
+# Options
+# burst = ["1"]  # type several keys per report for these key ids, or True for all keys
+# layout = "nl"  # keyboard layout of the host: "us" (default), "uk", "nl" (US-International), "de", "fr"
+# unicode = "windows"  # non-ASCII input: "ascii" (default) transliterates, "windows" uses Alt+0nnn, "linux" Ctrl+Shift+U
+# typematic = (500, 30)  # host auto-repeat delay (ms) and rate (per second), to type long runs by holding the key
+# delay = -50  # ms between keys, negative for a random delay, "auto" (default) to adapt to the host
+# preempt = "cancel"  # a key pressed while typing cancels the prompt and types its own, "queue" (default) types it after
+# cancel_key = "9"  # this key cancels the prompt being typed
+# echo = 20  # every 20 reports toggle Scroll Lock and wait for the host to echo the LED, so typing keeps pace with the host
@@ -1,34 +1,69 @@
 # allows to red the (python) configuration file and update the layout dictionary
 
+import hashlib
+import os
+import time
 
-def read_config(filepath: str):
-    # Create a dictionary to hold the variables defined in the file
-    local_vars = {}
 
-    try:
-        # Read the file content
-        with open(filepath, "r") as file:
-            code = file.read()
-
-    except FileNotFoundError as e:
-        print("File not found", e)
-        return None
-
-    # Execute the code in the context of the local_vars dictionary
-    try:
-        exec(code, {}, local_vars)
-    except SyntaxError as e:
-        print("Syntax error in the file", e)
-        return None
-
-    # Return the dictionary containing the variables
-    return local_vars
-
-
-def update_prompts(prompts: dict, filepath: str):
-    if update := read_config(filepath):
+def config_values(update, prompts: dict, options: dict):
+    # The prompts and the options in the variables of a config file.
+    # Options that are not set in the file keep the value passed in options.
+    if update:
         if "prompts" in update:
             prompts = update["prompts"]
         else:
             print("No prompts variable found in the file")
-    return prompts
+        options = {name: update.get(name, value) for name, value in options.items()}
+    return prompts, options
+
+
+class ConfigFile:
+    # A config file that is only read and executed again when it changed:
+    # os.stat size and mtime tell if it may have changed, the content hash if it did.
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._stat = None  # (size, mtime) of the last read, False if the file is missing
+        self._hash = b""
+        self.code = None  # compiled code of the file
+        self.reloads = 0  # times the file was executed
+        self.reload_us = 0  # cost of the last reload: read, compile and execute
+        self.total_reload_us = 0
+
+    def read(self):
+        # The variables defined in the file, None if it did not change since the last read
+        try:
+            st = os.stat(self.filepath)
+        except OSError as e:
+            if self._stat is not False:
+                print("File not found", e)
+                self._stat = False
+            return None
+        stat = (st[6], st[8])
+        if stat == self._stat:
+            return None
+        start = time.ticks_us()
+        self._stat = stat
+        with open(self.filepath, "r") as file:
+            source = file.read()
+        digest = hashlib.sha256(source.encode()).digest()
+        if digest == self._hash:
+            return None  # touched, but the same content
+        self._hash = digest
+        try:
+            self.code = compile(source, self.filepath, "exec")
+        except SyntaxError as e:
+            print("Syntax error in the file", e)
+            return None
+        del source
+        local_vars = {}
+        try:
+            exec(self.code, {}, local_vars)
+        except Exception as e:
+            # keep the bindings loaded before, a live reload must not stop the board
+            print("Error in the file", e)
+            return None
+        self.reloads += 1
+        self.reload_us = time.ticks_diff(time.ticks_us(), start)
+        self.total_reload_us += self.reload_us
+        return local_vars
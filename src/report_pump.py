@@ -0,0 +1,97 @@
+# Report pump: a queue of preallocated HID reports, sent back to back
+#
+# The producer copies reports into the queue without waiting, the transfer
+# completion callback submits the next queued report as soon as the previous
+# one was sent. The producer only moves head, the sending side, kick() and the
+# callback, only moves tail. The producer can run on the other core: with
+# kick_on_put off, only the core that owns the USB stack submits transfers.
+
+import time
+
+
+class ReportPump:
+    def __init__(self, itf, depth: int = 8, size: int = 8):
+        self._itf = itf  # the HID interface that owns the interrupt endpoint
+        self._buffers = [bytearray(size) for _ in range(depth)]
+        self.depth = depth
+        self.head = 0  # next buffer to fill
+        self.tail = 0  # buffer being sent, or the next one to send
+        self._sending = False
+        # clear() requests: a generation count << 8 | head, written by the producer
+        # in one go and applied by the sending side, which drops the reports before head
+        self._drop = 0
+        self._dropped = 0  # the last request that was applied
+        self.kick_on_put = True  # off when another core calls kick()
+        self._done_cb = self._done  # bound once, so submitting does not allocate
+        self.idle_at = time.ticks_ms()  # when the queue last ran dry
+        self.sent = 0
+        self.max_queued = 0  # high-water mark of the queue depth
+        self.underruns = 0  # times the queue ran dry while the producer had a report due
+
+    def __len__(self) -> int:
+        return (self.head - self.tail) % self.depth
+
+    def free(self) -> int:
+        # buffers that can be filled, one is kept apart to tell a full queue from an empty one
+        return self.depth - 1 - len(self)
+
+    def put(self, report) -> bool:
+        # Queue a copy of the report, False if the queue is full
+        if not self.free():
+            return False
+        head = self.head
+        self._buffers[head][:] = report  # the buffer takes the length of the report
+        self.head = (head + 1) % self.depth
+        if (queued := len(self)) > self.max_queued:
+            self.max_queued = queued
+        if self.kick_on_put:
+            self.kick()
+        return True
+
+    def kick(self):
+        # Start sending if the endpoint is idle and reports are queued
+        if self._sending:
+            return
+        if (drop := self._drop) != self._dropped:
+            self._dropped = drop
+            self.tail = drop & 0xFF
+        itf = self._itf
+        if self.tail != self.head and itf.is_open() and not itf.busy():
+            self._sending = True
+            itf.submit_xfer(itf._int_ep, self._buffers[self.tail], self._done_cb)
+
+    def check_underrun(self, due_ms: int):
+        # Before queueing a report that was due at due_ms: count an underrun if
+        # the queue ran dry after it was due, the producer fell behind
+        if not self._sending and time.ticks_diff(self.idle_at, due_ms) > 0:
+            self.underruns += 1
+
+    def clear(self):
+        # Drop the queued reports that were not submitted yet, once the transfer in
+        # flight is done or on the next kick(). Reports queued after this call are kept.
+        self._drop = ((self._drop >> 8) + 1 & 0xFFFF) << 8 | self.head
+        if self.kick_on_put:
+            self.kick()
+
+    def reset(self):
+        # After a USB bus reset, on the sending side: the transfer in flight was cancelled
+        # without calling back and the queued reports are stale. Reports queued after this call are kept.
+        self._dropped = self._drop
+        self.tail = self.head
+        self._sending = False
+        self.idle_at = time.ticks_ms()
+
+    def _done(self, ep_addr, result, xferred_bytes):
+        # Transfer completion callback: submit the next report right away
+        self.sent += 1
+        if (drop := self._drop) != self._dropped:
+            self._dropped = drop
+            tail = drop & 0xFF
+        else:
+            tail = (self.tail + 1) % self.depth
+        self.tail = tail
+        if tail != self.head:
+            self._itf.submit_xfer(ep_addr, self._buffers[tail], self._done_cb)
+        else:
+            self._sending = False
+            self.idle_at = time.ticks_ms()
@@ -0,0 +1,198 @@
+# Key scanning: reading and debouncing of raw key states
+#
+# Key states are bitmasks: bit n is set while key n is pressed.
+
+import machine
+import time
+
+from array import array
+
+from machine import Pin
+from micropython import const
+
+_SIO_GPIO_IN = const(0xD0000004)  # RP2040 SIO register with the input level of GPIO 0-29
+
+
+def gpio_number(pin) -> int:
+    # GPIO number of an rp2 Pin, from its repr: Pin(GPIO28, mode=IN, pull=PULL_DOWN)
+    name = str(pin)
+    start = end = name.index("GPIO") + 4
+    while end < len(name) and name[end].isdigit():
+        end += 1
+    return int(name[start:end])
+
+
+def read_gpio_in() -> int:
+    return machine.mem32[_SIO_GPIO_IN]
+
+
+class GpioScanner:
+    # Reads all key pins with one register access. read returns the GPIO input
+    # levels as a bitmask, pass a stand-in to test without hardware.
+
+    SCAN_WHILE_HELD = False  # every key has its own pin, each press raises an edge
+
+    def __init__(self, gpios, read=read_gpio_in):
+        self.gpios = bytes(gpios)  # GPIO number of each key
+        self.mask = 0
+        for gpio in gpios:
+            self.mask |= 1 << gpio
+        self._read = read
+        self._levels = 0
+        self.keys = 0  # key states of the last snapshot
+
+    def scan(self) -> int:
+        # Snapshot the key states, the GPIO bits are only mapped to keys when they changed
+        levels = self._read() & self.mask
+        if levels != self._levels:
+            self._levels = levels
+            keys = 0
+            gpios = self.gpios
+            for i in range(len(gpios)):
+                if levels >> gpios[i] & 1:
+                    keys |= 1 << i
+            self.keys = keys
+        return self.keys
+
+
+class MatrixScanner:
+    # Scans a key matrix: one strobe line is driven high at a time and the
+    # sense lines (inputs with pull-downs) read the keys on that line.
+    # Key n is at row n // len(cols), column n % len(cols).
+    # With col2row the diodes conduct from column to row, so the columns are
+    # strobed and the rows sensed, otherwise the rows are strobed.
+    # Between scans all strobes are held high, so a key press raises a sense
+    # line and its interrupt wakes the scan. A sense line is then the OR of
+    # its keys: while one is held, another key on the line raises no edge.
+
+    SCAN_WHILE_HELD = True  # keep scanning while a key is down
+    SCAN_OVERHEAD_US = 20  # estimate of the time to read and map one strobe line
+
+    def __init__(self, rows, cols, col2row=True, settle_us=5, budget_us=500, read=read_gpio_in):
+        self.rows = rows
+        self.cols = cols
+        self.n = len(rows) * len(cols)
+        self.strobes, self.senses = (cols, rows) if col2row else (rows, cols)
+        self.settle_us = settle_us
+        # strobe lines scanned per tick, the rest are scanned in the next ticks
+        self.per_tick = max(1, min(len(self.strobes), budget_us // (settle_us + self.SCAN_OVERHEAD_US)))
+        self._read = read
+        self._gpios = bytes(gpio_number(pin) for pin in self.senses)
+        self.mask = 0
+        for gpio in self._gpios:
+            self.mask |= 1 << gpio
+        # key bit of each (strobe, sense) position
+        ncols = len(cols)
+        self._bits = []
+        for s in range(len(self.strobes)):
+            self._bits.append([1 << (j * ncols + s if col2row else s * ncols + j) for j in range(len(self.senses))])
+        self._next = 0  # next strobe line to scan
+        self.keys = 0  # key states of the last scan
+        for pin in self.senses:
+            pin.init(Pin.IN, Pin.PULL_DOWN)
+        for pin in self.strobes:
+            pin.init(Pin.OUT, value=1)
+
+    def scan(self) -> int:
+        # Scan up to per_tick strobe lines, returns the key states
+        strobes = self.strobes
+        gpios = self._gpios
+        keys = self.keys
+        for pin in strobes:
+            pin.value(0)
+        for _ in range(self.per_tick):
+            s = self._next
+            bits = self._bits[s]
+            strobes[s].value(1)
+            time.sleep_us(self.settle_us)
+            levels = self._read() & self.mask
+            strobes[s].value(0)
+            for j in range(len(gpios)):
+                if levels >> gpios[j] & 1:
+                    keys |= bits[j]
+                else:
+                    keys &= ~bits[j]
+            self._next = (s + 1) % len(strobes)
+        for pin in strobes:
+            pin.value(1)
+        self.keys = keys
+        return keys
+
+
+class Debouncer:
+    # Counter debouncer: a key changes state after its raw input differs from the
+    # debounced state for press_ticks (or release_ticks) consecutive scan ticks.
+    # Never sleeps, call update() once per scan tick.
+
+    def __init__(self, n: int, press_ticks: int = 2, release_ticks: int = 5):
+        # up to 30 keys the bitmasks are small ints, larger matrices allocate long ints
+        assert 0 < n <= 64, "Debouncer: 1 to 64 keys"
+        self.n = n
+        self.press_ticks = press_ticks
+        self.release_ticks = release_ticks
+        self.state = 0  # debounced key states
+        self.busy = 0  # keys with a raw state that differs from the debounced state
+        self._counts = bytearray(n)
+
+    def update(self, raw: int) -> int:
+        # Advance one scan tick with the raw key states, returns the keys that changed state
+        diff = raw ^ self.state
+        if not diff and not self.busy:
+            return 0
+        counts = self._counts
+        changed = 0
+        for i in range(self.n):
+            bit = 1 << i
+            if diff & bit:
+                count = counts[i] + 1
+                if count >= (self.release_ticks if self.state & bit else self.press_ticks):
+                    changed |= bit
+                    count = 0
+                counts[i] = count
+            elif counts[i]:
+                counts[i] = 0  # bounced back
+        self.state ^= changed
+        self.busy = diff & ~changed
+        return changed
+
+
+class KeyEvents:
+    # Fixed-size ring buffer of timestamped key presses, without locks or allocation:
+    # one producer (put, may run in an IRQ) only moves head, one consumer (get)
+    # only moves tail. It holds size - 1 presses, a full buffer drops the new press
+    # and counts it.
+
+    def __init__(self, size: int = 16):
+        self.size = size
+        self._keys = bytearray(size)
+        self._ticks = array("I", bytes(4 * size))  # ticks_us of each press
+        self.head = 0  # next slot to put
+        self.tail = 0  # next slot to get
+        self.ticks_us = 0  # time of the press returned by the last get()
+        self.overflows = 0
+
+    def __len__(self) -> int:
+        return (self.head - self.tail) % self.size
+
+    def put(self, key: int, ticks_us: int) -> bool:
+        head = self.head
+        next = (head + 1) % self.size
+        if next == self.tail:
+            self.overflows += 1
+            return False
+        self._keys[head] = key
+        self._ticks[head] = ticks_us
+        self.head = next
+        return True
+
+    def get(self) -> int:
+        # Index of the oldest key press, -1 if there is none
+        tail = self.tail
+        if tail == self.head:
+            return -1
+        self.ticks_us = self._ticks[tail]
+        self.tail = (tail + 1) % self.size
+        return self._keys[tail]
+
+    def clear(self):
+        self.tail = self.head
@@ -0,0 +1,321 @@
+# Typist: types compiled prompts through the keyboard interface, one report per step
+#
+# Schedules the reports of a prompt, retries the ones that did not get through,
+# probes the host with Scroll Lock taps for closed loop pacing and restores the
+# lock keys after a prompt. The board owns USB, the report pump and the pacer,
+# step() never blocks: it is interleaved with scanning, run as an asyncio task
+# or on the other core.
+
+import logging
+import time
+
+from macro_kc import HOLD, PAUSE, keychord_events
+from usb.device.keyboard import KeyCode, LEDCode
+
+log = logging.getLogger("kb")
+
+_RELEASE_REPORT = bytes(8)  # keyboard report with no keys pressed
+_CAPS_LOCK_REPORT = bytes((0, 0, KeyCode.CAPS_LOCK, 0, 0, 0, 0, 0))
+_SCROLL_LOCK_REPORT = bytes((0, 0, KeyCode.SCROLL_LOCK, 0, 0, 0, 0, 0))
+_CAPS_LOCK_TAP = _CAPS_LOCK_REPORT + _RELEASE_REPORT  # compiled reports, see compile_keychords()
+
+
+def caps_lock_off(chunks):
+    # Compiled prompts assume Caps Lock is off: turn it off while typing,
+    # end() turns it back on, also when the prompt is cancelled.
+    yield _CAPS_LOCK_TAP
+    yield from chunks
+
+
+class Typist:
+    ECHO_TIMEOUT_MS = 500  # a host that does not echo the Scroll Lock LED by then never does
+    DELIVERY_MS = 500  # retry a report that could not be sent for this long, then drop it
+
+    def __init__(self, board):
+        self._board = board  # the keyboard interface: send_raw_report(), ready(), led_mask, pump
+        self._pacer = board.pacer
+        self._chunks = None  # compiled reports of the prompt being typed, see compile_keychords()
+        self._reports = None  # the chunk being typed
+        self._report_view = None  # memoryview of the chunk, sending a report is a slice
+        # PAUSE release reports, only their modifier byte changes. The other one may still be in flight.
+        self._release_reports = [bytearray(8), bytearray(8)]
+        self._events = None
+        self.event = None  # next (deadline_ticks, record index) to send
+        self._shift_ms = 0  # added to the deadlines: how late the presses of held keys went out
+        self._delay = 0
+        self._full_at = None  # ticks_us when a due report found the pump full
+        # closed loop pacing: Scroll Lock is toggled and typing waits for the host to echo the LED
+        self._echo_every = 0  # reports between probes, 0 when off
+        self._echo_count = 0  # reports sent since the last probe
+        self._echo_at = None  # ticks_ms of the probe that is waiting for its echo
+        self._echo_leds = 0  # led_mask expected after the echo
+        self._echo_toggled = False  # Scroll Lock differs from before the prompt
+        self._probe_due = False  # the next probe waits for send_pending()
+        # Caps Lock is toggled by caps_lock_off() and by prompts typed with Caps Lock, see _compile_capitals()
+        self._caps_toggled = False  # Caps Lock differs from before the prompt
+        self._caps_expected = None  # Caps Lock state after the last press, until led_mask shows it
+        self._caps_at = 0  # ticks_ms of the last Caps Lock press
+        self._caps_sent = 0  # pump.sent once the last Caps Lock press is sent
+        self.echo_ms = 0  # last host round trip
+        self.max_echo_ms = 0
+        # delivery of the reports since start-up
+        self.reports_sent = 0
+        self.reports_retried = 0  # failed attempts that were retried
+        self.reports_dropped = 0  # reports given up after DELIVERY_MS
+        self.longest_stall_ms = 0  # longest time a report took to get through
+        self._failed_at = None  # ticks_ms of the first failed attempt of the current report
+        self._release_pending = False  # the all-released report still has to get through
+        self.press_us = None  # time of the press that started the prompt, until its first report
+        self.latency_us = 0  # press to first report of the last prompt
+        self.max_latency_us = 0
+
+    def start(self, chunks, delay, echo_every: int = 0):
+        # Start typing the compiled reports of a prompt, chunk by chunk, sent by step().
+        # delay: see keychord_events(), or "auto" to adapt to the host
+        self._delay = self._pacer.next_delay if delay == "auto" else delay
+        self._echo_every = echo_every
+        self._echo_count = 0
+        self._shift_ms = 0
+        # the first report of the prompt replaces the keys the host holds, a pending
+        # release is not needed. Lock keys still to be restored stay toggled.
+        self._failed_at = None
+        self._release_pending = False
+        self._chunks = iter(chunks)
+        if self.caps_lock():
+            self._chunks = caps_lock_off(self._chunks)
+        self.event = self._next_event()
+        if self.event is None:
+            self.end()
+
+    def _next_event(self):
+        # the next event of the current chunk, moving on to the next chunk of a big prompt
+        while True:
+            if self._events is not None:
+                if (event := next(self._events, None)) is not None:
+                    return event
+            self._reports = next(self._chunks, None)
+            if self._reports is None:
+                self._report_view = self._events = None
+                return None
+            self._report_view = memoryview(self._reports)
+            self._events = keychord_events(self._reports, self._delay)
+
+    def end(self):
+        # avoid repeating the last key after the end of the macro, and restore
+        # Caps Lock and Scroll Lock without waiting for the echo
+        self._failed_at = None  # a report still failing is dropped with the prompt
+        self._full_at = None
+        self._probe_due = False
+        self._echo_at = None
+        self._chunks = self._reports = self._report_view = self._events = self.event = None
+        self.send_release()
+        log.debug(f"Reports: {self.delivery_stats()}")
+
+    def cancel(self):
+        # Stop typing between two reports, end() releases all keys
+        if self.is_typing():
+            log.info("Prompt cancelled")
+            pump = self._board.pump
+            if pump is not None and pump.sent - self._caps_sent >= 0:
+                # the queued reports are not typed, unless a Caps Lock press is among them:
+                # the Caps Lock state would no longer be known
+                pump.clear()
+            self.end()
+
+    def is_typing(self) -> bool:
+        return self.event is not None
+
+    def caps_lock(self) -> bool:
+        # Caps Lock state of the host: its LEDs, unless a Caps Lock press was sent that
+        # they do not show yet, such as a restore at the end of the previous prompt
+        on = bool(self._board.led_mask & LEDCode.CAPS_LOCK)
+        if (expected := self._caps_expected) is None:
+            return on
+        if on == expected or time.ticks_diff(time.ticks_ms(), self._caps_at) > self.ECHO_TIMEOUT_MS:
+            self._caps_expected = None
+            return on
+        return expected
+
+    def _caps_pressed(self, was_on: bool):
+        # a Caps Lock press was sent, the host toggles Caps Lock before its LEDs show it
+        self._caps_expected = not was_on
+        self._caps_at = time.ticks_ms()
+        self._caps_toggled = not self._caps_toggled
+        if (pump := self._board.pump) is not None:
+            queued = len(pump)  # read first, the other core may send meanwhile
+            self._caps_sent = pump.sent + queued
+
+    def deadline(self) -> int:
+        # ticks_ms when the next report is due
+        return time.ticks_add(self.event[0], self._shift_ms)
+
+    def echo_pending(self) -> bool:
+        # True while typing waits for the host to echo the last probe
+        if self._echo_at is None:
+            return False
+        wait = time.ticks_diff(time.ticks_ms(), self._echo_at)
+        if not (self._board.led_mask ^ self._echo_leds) & LEDCode.SCROLL_LOCK:
+            self.echo_ms = wait
+            self.max_echo_ms = max(self.max_echo_ms, wait)
+            self._pacer.observe_echo(wait)
+        elif wait > self.ECHO_TIMEOUT_MS:
+            log.warning("No Scroll Lock echo from the host, closed loop pacing is off")
+            self._echo_every = 0
+        else:
+            return True
+        self._echo_at = None
+        return False
+
+    def _send(self, report) -> bool:
+        if ok := self._board.send_raw_report(report):
+            self.reports_sent += 1
+        return ok
+
+    def delivered(self, ok: bool, drop: bool = True) -> bool:
+        # Account for an attempt to send the current report.
+        # False while it should be retried, True once it was sent or dropped.
+        now = time.ticks_ms()
+        if self._failed_at is None:
+            if ok:
+                return True
+            self._failed_at = now
+        stall = time.ticks_diff(now, self._failed_at)
+        if not ok and not (drop and stall >= self.DELIVERY_MS):
+            self.reports_retried += 1
+            return False
+        if not ok:
+            self.reports_dropped += 1
+            log.warning(f"Report dropped after {stall} ms")
+        self.longest_stall_ms = max(self.longest_stall_ms, stall)
+        self._failed_at = None
+        return True
+
+    def send_release(self):
+        # Release all keys, retried by step() until it gets through: a key is never left down
+        self._release_pending = True
+        self.send_pending()
+
+    def pending(self) -> bool:
+        # reports that send_pending() still has to get through
+        return self._release_pending or self._probe_due or self.event is None and (self._caps_toggled or self._echo_toggled)
+
+    def send_pending(self) -> bool:
+        # Send the reports that must reach the host, in order: the release of all keys,
+        # the Scroll Lock probe and, after a prompt, the lock key taps that restore
+        # Caps Lock and Scroll Lock. A lock key press is followed by a release.
+        # Only the probe can be dropped. True once all got through, False while
+        # step() has to retry.
+        while True:
+            if self._release_pending:
+                report = _RELEASE_REPORT
+            elif self.event is None and self._caps_toggled:
+                report = _CAPS_LOCK_REPORT
+            elif self._probe_due or self.event is None and self._echo_toggled:
+                report = _SCROLL_LOCK_REPORT
+            else:
+                return True
+            # read before the host can answer
+            leds = self._board.led_mask ^ LEDCode.SCROLL_LOCK
+            caps = self.caps_lock()
+            ok = self._send(report)
+            if not self.delivered(ok, drop=self._probe_due):
+                return False
+            if report is _RELEASE_REPORT:
+                self._release_pending = False
+                continue
+            if report is _CAPS_LOCK_REPORT:
+                self._caps_pressed(caps)
+            elif self._probe_due:
+                self._probe_due = False
+                if not ok:
+                    continue  # dropped, no echo to wait for
+                # the host answers with a SET_REPORT of its LEDs once it processed the reports sent so far
+                self._echo_leds = leds
+                self._echo_at = time.ticks_ms()
+                self._echo_toggled = not self._echo_toggled
+            else:
+                self._echo_toggled = False
+            self._release_pending = True  # the lock key is down
+
+    def delivery_stats(self) -> dict:
+        return {
+            "sent": self.reports_sent,
+            "retried": self.reports_retried,
+            "dropped": self.reports_dropped,
+            "longest_stall_ms": self.longest_stall_ms,
+        }
+
+    def step(self):
+        # Send the next report of the prompt being typed, if it is due. Never blocks.
+        board = self._board
+        if self.event is None:
+            if self.pending() and board.ready():
+                self.send_pending()
+            return
+        if (self._release_pending or self._probe_due) and (not board.ready() or not self.send_pending()):
+            return
+        if self.echo_pending():
+            return
+        deadline, i = self.event
+        deadline = time.ticks_add(deadline, self._shift_ms)
+        if time.ticks_diff(time.ticks_ms(), deadline) < 0:
+            return
+        reports = self._reports
+        pause = reports[i + 1] == PAUSE
+        # a press the host auto-repeats: the release is timed from the press, which must
+        # not wait behind queued reports
+        held = not pause and i + 8 < len(reports) and reports[i + 9] == HOLD
+        if (pump := board.pump) is not None:
+            if pump.kick_on_put:
+                pump.kick()  # this core submits the reports
+            if not pump.free():
+                # back-pressure: the time a due report waits for a buffer paces the typing
+                if self._full_at is None:
+                    self._full_at = time.ticks_us()
+                return
+            if self._full_at is not None:
+                board.waited_us = time.ticks_diff(time.ticks_us(), self._full_at)
+                self._full_at = None
+            if held:
+                if len(pump):
+                    return  # the queue runs dry first
+            else:
+                pump.check_underrun(deadline)
+        if caps_press := not pause and reports[i + 2] == KeyCode.CAPS_LOCK:
+            caps = self.caps_lock()  # read before the host can answer
+        if pause:
+            # waited - avoid repeating the last key during long delays,
+            # keep the modifiers held that the next key needs
+            release = self._release_reports
+            r = release[0]
+            r[0] = reports[i]
+            if ok := self._send(r):
+                release[0], release[1] = release[1], r
+        else:
+            # the reports were built when the prompt was compiled, sending one is a slice
+            ok = self._send(self._report_view[i : i + 8])
+        if not self.delivered(ok):
+            return  # the same report is sent again on the next step
+        if ok and caps_press:
+            self._caps_pressed(caps)
+        if ok and held and (late := time.ticks_diff(time.ticks_ms(), deadline)) > 0:
+            # the hold, and the rest of the prompt, starts when the press went out
+            self._shift_ms += late
+        self._echo_count += 1
+        if ok and self._echo_every and self._echo_count >= self._echo_every and not pause:
+            # probe at the end of a character, where the PAUSE that follows holds no
+            # modifier: not inside an Alt + numpad or dead key sequence, or while
+            # the host repeats a held key
+            j = i + 8
+            if j < len(reports) and reports[j + 1] == PAUSE and not reports[j]:
+                self._probe_due = True
+                self._echo_count = 0
+                if board.ready():
+                    self.send_pending()
+        if self.press_us is not None:
+            self.latency_us = time.ticks_diff(time.ticks_us(), self.press_us)
+            self.max_latency_us = max(self.max_latency_us, self.latency_us)
+            self.press_us = None
+        self.event = self._next_event()
+        if self.event is None:
+            self.end()
@@ -0,0 +1,33 @@
+# Host-side stand-ins for the MicroPython modules that src/scan.py imports,
+# so the scanning can be tested with CPython: python -m pytest tests
+
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+try:
+    import micropython  # noqa: F401
+except ImportError:
+    micropython = types.ModuleType("micropython")
+    micropython.const = lambda value: value
+    sys.modules["micropython"] = micropython
+
+try:
+    import machine  # noqa: F401
+except ImportError:
+
+    class Pin:
+        IN = OUT = PULL_DOWN = 0
+
+        def __init__(self, name: str = ""):
+            self.name = name
+
+        def __repr__(self):
+            return f"Pin({self.name}, mode=IN, pull=PULL_DOWN)"
+
+    machine = types.ModuleType("machine")
+    machine.Pin = Pin
+    machine.mem32 = {}
+    sys.modules["machine"] = machine
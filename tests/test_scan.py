@@ -0,0 +1,97 @@
+# Host tests for the key scanning: GpioScanner with a stand-in for the GPIO_IN
+# register, Debouncer and KeyEvents
+
+from machine import Pin
+from scan import Debouncer, GpioScanner, KeyEvents, gpio_number
+
+
+class Register:
+    # stand-in for the SIO GPIO_IN register, counts the reads
+    def __init__(self, value: int = 0):
+        self.value = value
+        self.reads = 0
+
+    def read(self) -> int:
+        self.reads += 1
+        return self.value
+
+
+def test_gpio_number():
+    assert gpio_number(Pin("GPIO28")) == 28
+    assert gpio_number(Pin("GPIO2")) == 2
+
+
+def test_scanner_maps_gpios_to_keys():
+    register = Register()
+    scanner = GpioScanner([28, 2, 5], read=register.read)
+    assert scanner.scan() == 0
+    register.value = 1 << 5 | 1 << 28
+    assert scanner.scan() == 0b101
+    assert register.reads == 2  # one register access per snapshot
+
+
+def test_scanner_reports_simultaneous_presses():
+    register = Register(1 << 2 | 1 << 5 | 1 << 28)
+    assert GpioScanner([28, 2, 5], read=register.read).scan() == 0b111
+
+
+def test_scanner_ignores_other_gpios():
+    register = Register(1 << 3 | 1 << 25)  # pins that are not keys
+    assert GpioScanner([28, 2], read=register.read).scan() == 0
+
+
+def test_debouncer_press_and_release():
+    debouncer = Debouncer(2, press_ticks=2, release_ticks=3)
+    assert debouncer.update(0b01) == 0
+    assert debouncer.busy == 0b01
+    assert debouncer.update(0b01) == 0b01
+    assert debouncer.state == 0b01 and debouncer.busy == 0
+    assert debouncer.update(0) == 0
+    assert debouncer.update(0) == 0
+    assert debouncer.update(0) == 0b01
+    assert debouncer.state == 0
+
+
+def test_debouncer_ignores_a_bounce():
+    debouncer = Debouncer(1, press_ticks=2)
+    assert debouncer.update(1) == 0
+    assert debouncer.update(0) == 0  # bounced back, the count starts over
+    assert debouncer.busy == 0
+    assert debouncer.update(1) == 0
+    assert debouncer.update(1) == 1
+
+
+def test_debouncer_keys_change_together():
+    debouncer = Debouncer(3, press_ticks=1)
+    assert debouncer.update(0b110) == 0b110
+
+
+def test_debouncer_settled_does_no_work():
+    debouncer = Debouncer(4)
+    assert debouncer.update(0) == 0
+    assert debouncer._counts == bytearray(4)
+
+
+def test_key_events_in_order():
+    events = KeyEvents(4)
+    assert events.get() == -1
+    assert events.put(2, 100) and events.put(0, 200)
+    assert len(events) == 2
+    assert events.get() == 2 and events.ticks_us == 100
+    assert events.get() == 0 and events.ticks_us == 200
+    assert events.get() == -1
+
+
+def test_key_events_full_drops_new_press():
+    events = KeyEvents(3)  # holds 2 presses
+    assert events.put(1, 0) and events.put(2, 0)
+    assert not events.put(3, 0)
+    assert events.overflows == 1
+    assert [events.get(), events.get(), events.get()] == [1, 2, -1]
+
+
+def test_key_events_clear():
+    events = KeyEvents(4)
+    events.put(1, 0)
+    events.clear()
+    assert len(events) == 0 and events.get() == -1
@@ -0,0 +1,244 @@
+# Generate the keyboard layout tables in src/layout_<name>.py
+#
+# Run on the host with CPython: `python tools/gen_layouts.py`
+#
+# Each layout module holds bytes tables indexed by character code. When frozen
+# into the firmware (see firmware/RPI_PICO/manifest.py) the tables stay in flash.
+
+from pathlib import Path
+
+SHIFT = 0x02  # left shift
+ALTGR = 0x40  # right alt
+DEAD = 0x80  # flag: a dead key, type a space after it to get the character
+
+# HID usages, named after the key on a US keyboard
+A, Z = 4, 29
+N1, N2, N3, N4, N5, N6, N7, N8, N9, N0 = range(30, 40)
+ENTER, TAB, SPACE = 40, 43, 44
+MINUS, EQUAL, OPEN_BRACKET, CLOSE_BRACKET, BACKSLASH, HASH = range(45, 51)
+COLON, QUOTE, TILDE, COMMA, DOT, SLASH = range(51, 57)
+NON_US_BACKSLASH = 100
+
+
+class Dead(str):
+    # a character on a dead key
+    pass
+
+
+def letter(c: str) -> int:
+    return A + ord(c) - ord("a")
+
+
+def letters(swap: dict = {}) -> dict:
+    # letter keys, swap maps the key (US name) to the letter it types
+    keys = {}
+    for c in "abcdefghijklmnopqrstuvwxyz":
+        typed = swap.get(c, c)
+        keys[letter(c)] = (typed, typed.upper())
+    return keys
+
+
+# Characters per key: (no modifier, Shift, AltGr, Shift+AltGr)
+US = {
+    **letters(),
+    N1: ("1", "!"),
+    N2: ("2", "@"),
+    N3: ("3", "#"),
+    N4: ("4", "$"),
+    N5: ("5", "%"),
+    N6: ("6", "^"),
+    N7: ("7", "&"),
+    N8: ("8", "*"),
+    N9: ("9", "("),
+    N0: ("0", ")"),
+    MINUS: ("-", "_"),
+    EQUAL: ("=", "+"),
+    OPEN_BRACKET: ("[", "{"),
+    CLOSE_BRACKET: ("]", "}"),
+    BACKSLASH: ("\\", "|"),
+    COLON: (";", ":"),
+    QUOTE: ("'", '"'),
+    TILDE: ("`", "~"),
+    COMMA: (",", "<"),
+    DOT: (".", ">"),
+    SLASH: ("/", "?"),
+}
+
+UK = {
+    **US,
+    N2: ("2", '"'),
+    N3: ("3", "£"),
+    N4: ("4", "$", "€"),
+    QUOTE: ("'", "@"),
+    HASH: ("#", "~"),
+    TILDE: ("`", "¬"),
+    NON_US_BACKSLASH: ("\\", "|"),
+}
+del UK[BACKSLASH]
+
+# US-International, the common choice for Dutch
+US_INTL = {
+    **US,
+    N6: ("6", Dead("^")),
+    QUOTE: (Dead("'"), Dead('"')),
+    TILDE: (Dead("`"), Dead("~")),
+    N1: ("1", "!", "¡", "¹"),
+    N2: ("2", "@", "²"),
+    N3: ("3", "#", "³"),
+    N4: ("4", "$", "¤", "£"),
+    N5: ("5", "%", "€"),
+    N9: ("9", "(", "‘"),
+    N0: ("0", ")", "’"),
+    EQUAL: ("=", "+", "×", "÷"),
+    OPEN_BRACKET: ("[", "{", "«"),
+    CLOSE_BRACKET: ("]", "}", "»"),
+    COLON: (";", ":", "¶", "°"),
+    SLASH: ("/", "?", "¿"),
+    COMMA: (",", "<", "ç", "Ç"),
+    letter("q"): ("q", "Q", "ä", "Ä"),
+    letter("w"): ("w", "W", "å", "Å"),
+    letter("e"): ("e", "E", "é", "É"),
+    letter("r"): ("r", "R", "®"),
+    letter("y"): ("y", "Y", "ü", "Ü"),
+    letter("u"): ("u", "U", "ú", "Ú"),
+    letter("i"): ("i", "I", "í", "Í"),
+    letter("o"): ("o", "O", "ó", "Ó"),
+    letter("p"): ("p", "P", "ö", "Ö"),
+    letter("a"): ("a", "A", "á", "Á"),
+    letter("s"): ("s", "S", "ß", "§"),
+    letter("l"): ("l", "L", "ø", "Ø"),
+    letter("z"): ("z", "Z", "æ", "Æ"),
+    letter("c"): ("c", "C", "©", "¢"),
+    letter("n"): ("n", "N", "ñ", "Ñ"),
+    letter("m"): ("m", "M", "µ"),
+}
+
+DE = {
+    **letters({"y": "z", "z": "y"}),
+    letter("q"): ("q", "Q", "@"),
+    letter("e"): ("e", "E", "€"),
+    letter("m"): ("m", "M", "µ"),
+    N1: ("1", "!"),
+    N2: ("2", '"', "²"),
+    N3: ("3", "§", "³"),
+    N4: ("4", "$"),
+    N5: ("5", "%"),
+    N6: ("6", "&"),
+    N7: ("7", "/", "{"),
+    N8: ("8", "(", "["),
+    N9: ("9", ")", "]"),
+    N0: ("0", "=", "}"),
+    MINUS: ("ß", "?", "\\"),
+    EQUAL: (Dead("´"), Dead("`")),
+    OPEN_BRACKET: ("ü", "Ü"),
+    CLOSE_BRACKET: ("+", "*", "~"),
+    HASH: ("#", "'"),
+    COLON: ("ö", "Ö"),
+    QUOTE: ("ä", "Ä"),
+    TILDE: (Dead("^"), "°"),
+    COMMA: (",", ";"),
+    DOT: (".", ":"),
+    SLASH: ("-", "_"),
+    NON_US_BACKSLASH: ("<", ">", "|"),
+}
+
+FR = {
+    **letters({"q": "a", "a": "q", "w": "z", "z": "w"}),
+    letter("e"): ("e", "E", "€"),
+    letter("m"): (",", "?"),
+    N1: ("&", "1"),
+    N2: ("é", "2", Dead("~")),
+    N3: ('"', "3", "#"),
+    N4: ("'", "4", "{"),
+    N5: ("(", "5", "["),
+    N6: ("-", "6", "|"),
+    N7: ("è", "7", Dead("`")),
+    N8: ("_", "8", "\\"),
+    N9: ("ç", "9", "^"),
+    N0: ("à", "0", "@"),
+    MINUS: (")", "°", "]"),
+    EQUAL: ("=", "+", "}"),
+    OPEN_BRACKET: (Dead("^"), Dead("¨")),
+    CLOSE_BRACKET: ("$", "£", "¤"),
+    HASH: ("*", "µ"),
+    COLON: ("m", "M"),
+    QUOTE: ("ù", "%"),
+    TILDE: ("²",),
+    COMMA: (";", "."),
+    DOT: (":", "/"),
+    SLASH: ("!", "§"),
+    NON_US_BACKSLASH: ("<", ">"),
+}
+
+LAYOUTS = {
+    "us": ("US (QWERTY)", US),
+    "uk": ("UK (QWERTY)", UK),
+    "nl": ("US-International (QWERTY), for Dutch", US_INTL),
+    "de": ("German (QWERTZ)", DE),
+    "fr": ("French (AZERTY)", FR),
+}
+
+# Same on every layout. Shift-Enter gives LF without Sending(Enter) the prompt in Copilot
+COMMON = {"\t": (0, TAB), "\n": (SHIFT, ENTER), " ": (0, SPACE)}
+
+MODIFIERS = (0, SHIFT, ALTGR, SHIFT | ALTGR)
+
+
+def build(keys: dict):
+    mods = bytearray(256)
+    codes = bytearray(256)
+    extra = {}
+    chosen = {char: mod_key for char, mod_key in COMMON.items()}
+    for key, chars in keys.items():
+        for mod, char in zip(MODIFIERS, chars):
+            if isinstance(char, Dead):
+                mod |= DEAD
+            # prefer a live key, then the first one listed
+            current = chosen.get(char)
+            if current is None or (current[0] & DEAD and not mod & DEAD):
+                chosen[char] = (mod, key)
+    for char, (mod, key) in chosen.items():
+        c = ord(char)
+        if c <= 0xFF:
+            mods[c] = mod
+            codes[c] = key
+        else:
+            extra[c] = (mod, key)
+    return mods, codes, extra
+
+
+def as_literal(name: str, data: bytes, comment: str) -> str:
+    if not data:
+        return f'{name} = b""  # {comment}'
+    lines = [f"{name} = (  # {comment}"]
+    for i in range(0, len(data), 16):
+        chunk = "".join(f"\\x{b:02x}" for b in data[i : i + 16])
+        lines.append(f'    b"{chunk}"')
+    lines.append(")")
+    return "\n".join(lines)
+
+
+def write_layout(target: Path, name: str):
+    description, keys = LAYOUTS[name]
+    mods, codes, extra = build(keys)
+    extra_bytes = b"".join(bytes((c >> 8, c & 0xFF, mod, key)) for c, (mod, key) in sorted(extra.items()))
+    source = "\n".join(
+        [
+            "# Generated by tools/gen_layouts.py, do not edit",
+            f"# {description} keyboard layout",
+            "",
+            as_literal("MODS", mods, "modifier mask per character code, 0x80: dead key"),
+            as_literal("KEYS", codes, "keycode per character code, 0 if not on the layout"),
+            as_literal("EXTRA", extra_bytes, "code point (2 bytes), modifier mask, keycode"),
+            "",
+        ]
+    )
+    path = target / f"layout_{name}.py"
+    path.write_text(source, encoding="utf-8")
+    print(f"{path}: {sum(1 for k in codes if k)} characters + {len(extra)} extra")
+
+
+if __name__ == "__main__":
+    target = Path(__file__).parent.parent / "src"
+    for name in LAYOUTS:
+        write_layout(target, name)